@@ -1,6 +1,6 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 import json
 import os
 import re
@@ -322,16 +322,70 @@ class FirestoreService:
             print(f"Error getting tracker data for tracker_code '{tracker_code}': {e}")
             return None
     
-    def get_all_tracker_data(self) -> Dict[str, Any]:
-        """Get all tracker data"""
+    def iter_tracker_data(self, page_size: int = 500, fields: Optional[List[str]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (tracker_code, data) for all tracker data, one cursor-paginated page per request"""
+        collection = self._get_collection('tracker_data')
+        query = (collection.select(fields) if fields else collection).order_by('__name__').limit(page_size)
+        last_doc = None
+        while True:
+            page = query.start_after(last_doc) if last_doc is not None else query
+            count = 0
+            for doc in page.stream():
+                count += 1
+                last_doc = doc
+                yield doc.id, doc.to_dict()
+            if count < page_size:
+                return
+    
+    def get_all_tracker_data(self, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get all tracker data, projected server-side to the given fields if any"""
         try:
-            collection = self._get_collection('tracker_data')
-            docs = collection.stream()
-            return {doc.id: doc.to_dict() for doc in docs}
+            return dict(self.iter_tracker_data(fields=fields))
         except Exception as e:
             print(f"Error getting all tracker data: {e}")
             return {}
     
+    def get_first_n_trackers(self, n: int, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get the first n tracker data documents (by document ID) using a server-side limit"""
+        try:
+            collection = self._get_collection('tracker_data')
+            query = collection.select(fields) if fields else collection
+            return {doc.id: doc.to_dict() for doc in query.limit(n).stream()}
+        except Exception as e:
+            print(f"Error getting first {n} trackers: {e}")
+            return {}
+    
+    def count_tracker_data(self) -> Optional[int]:
+        """Count tracker data documents with a server-side aggregation query"""
+        try:
+            result = self._get_collection('tracker_data').count().get()
+            return result[0][0].value
+        except Exception as e:
+            print(f"Error counting tracker data: {e}")
+            return None
+    
+    def _get_documents(self, collection_name: str, document_ids: List[str]) -> Dict[str, Any]:
+        """Read the given documents of a collection in one batched request, skipping missing ones"""
+        collection = self._get_collection(collection_name)
+        docs = self.db.get_all([collection.document(document_id) for document_id in document_ids])
+        return {doc.id: doc.to_dict() for doc in docs if doc.exists}
+    
+    def get_tracker_data_batch(self, tracker_codes: List[str]) -> Dict[str, Any]:
+        """Get tracker data for the given document IDs in one batched read"""
+        try:
+            return self._get_documents('tracker_data', tracker_codes)
+        except Exception as e:
+            print(f"Error in batch get tracker data: {e}")
+            return {}
+    
+    def get_tracker_status_batch(self, tracker_codes: List[str]) -> Dict[str, Any]:
+        """Get tracker statuses for the given document IDs in one batched read"""
+        try:
+            return self._get_documents('tracker_status', tracker_codes)
+        except Exception as e:
+            print(f"Error in batch get tracker status: {e}")
+            return {}
+    
     def save_tracker_scan_count(self, tracking_id: str, count_data: Dict[str, Any]):
         """Save tracker scan count to Firestore"""
         try:
@@ -548,8 +602,10 @@ class FirestoreService:
             for scan in data.get('scans', []):
                 self.save_scan(scan)
             
-            # Migrate tracker status
+            # Migrate tracker status (the JSON backend stores packed scan bits)
             for tracker_code, status in data.get('tracker_status', {}).items():
+                if isinstance(status, int):
+                    status = {"label": bool(status & 1), "packing": bool(status & 2), "dispatch": bool(status & 4)}
                 self.save_tracker_status(tracker_code, status)
             
             # Migrate uploaded trackers
@@ -6,7 +6,9 @@ Google Sheets Service for data synchronization - EXACT SAME LOGIC AS simple_past
 import os
 import json
 from datetime import datetime
-from typing import List, Dict, Any
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Any, Optional
 import gspread
 from gspread import WorksheetNotFound
 from google.oauth2.service_account import Credentials
@@ -18,6 +20,93 @@ from app.services.firestore_service import firestore_service
 
 logger = logging.getLogger(__name__)
 
+# Sheet columns, A through LAST_COLUMN
+HEADERS = [
+    'Tracker Code', 'Tracking ID', 'Order ID', 'Stage', 'Status',
+    'Channel', 'Courier', 'City', 'State', 'Pincode', 'Amount', 'Qty', 'Payment', 'Order Status',
+    'G-Code', 'EAN-Code', 'Product SKU', 'Listing ID', 'Invoice', 'Sub Order ID', 'Last Updated'
+]
+LAST_COLUMN = 'U'
+HEADER_RANGE = f"A1:{LAST_COLUMN}1"
+
+# Tracker detail fields pasted into the sheet, in column order
+DETAIL_FIELDS = (
+    'order_id', 'channel_name', 'courier', 'buyer_city', 'buyer_state', 'buyer_pincode', 'amount',
+    'qty', 'payment_mode', 'order_status', 'g_code', 'ean_code', 'product_sku_code',
+    'channel_listing_id', 'invoice_number', 'sub_order_id', 'last_updated'
+)
+# Values used for detail fields a tracker does not have
+DETAIL_DEFAULTS = dict.fromkeys(DETAIL_FIELDS, '')
+DETAIL_DEFAULTS['amount'] = 0
+get_detail_fields = itemgetter(*DETAIL_FIELDS)
+# Tracker fields read by the sheet rows; Firestore ships only these
+TRACKER_SHEET_FIELDS = ['shipment_tracker', *DETAIL_FIELDS]
+
+def disable_text_wrapping(spreadsheet, worksheet, end_row):
+    """Clip the text of the pasted cells; formatting is cosmetic, so failures are only logged"""
+    try:
+        spreadsheet.batch_update({
+            "requests": [
+                {
+                    "repeatCell": {
+                        "range": {
+                            "sheetId": worksheet.id,
+                            "startRowIndex": 0,
+                            "endRowIndex": end_row,
+                            "startColumnIndex": 0,
+                            "endColumnIndex": len(HEADERS)
+                        },
+                        "cell": {"userEnteredFormat": {"wrapStrategy": "CLIP"}},
+                        "fields": "userEnteredFormat.wrapStrategy"
+                    }
+                }
+            ]
+        })
+        logger.info("📄 Disabled text wrapping")
+    except Exception as wrap_error:
+        logger.warning(f"⚠️ Could not disable text wrapping: {wrap_error}")
+
+@lru_cache(maxsize=64)
+def stage_status_from_flags(label_scanned, packing_scanned, dispatch_scanned, pending, cancelled):
+    """Calculate stage and status from boolean flags using exact frontend logic (memoized: 32 inputs)"""
+    # Determine Stage (EXACTLY matching frontend getCurrentStage logic)
+    if cancelled:
+        stage = 'Dispatch Cancelled'
+    elif dispatch_scanned:
+        stage = 'Dispatch'
+    # Dispatch Pending: label = true, packing = true, pending = true
+    elif label_scanned and packing_scanned and pending:
+        stage = 'Dispatch Pending'
+    elif packing_scanned:
+        stage = 'Packing'
+    # Packing Hold: label = true, pending = true (but packing = false)
+    elif label_scanned and pending:
+        stage = 'Packing Hold'
+    elif label_scanned:
+        stage = 'Packing Pending'
+    else:
+        stage = 'Label'
+    
+    # Determine Status (EXACTLY matching frontend getCurrentStatusWithPackingPending logic)
+    if cancelled:
+        current_status = 'Cancelled'
+    elif dispatch_scanned:
+        current_status = 'Dispatched'
+    # Dispatch Pending: label = true, packing = true, pending = true
+    elif label_scanned and packing_scanned and pending:
+        current_status = 'Dispatch Pending'
+    elif packing_scanned:
+        current_status = 'Packing Scanned'
+    # Packing Hold: label = true, pending = true (but packing = false)
+    elif label_scanned and pending:
+        current_status = 'Packing Hold'
+    elif label_scanned:
+        current_status = 'Packing Pending Shipment'
+    else:
+        current_status = 'Label yet to Scan'
+    
+    return stage, current_status
+
 class GoogleSheetsService:
     def __init__(self):
         self.sheets_service = None
@@ -71,59 +160,29 @@ class GoogleSheetsService:
 
     def get_stage_and_status_from_flags(self, status):
         """Calculate stage and status from boolean flags using exact frontend logic"""
-        # Get scan status information
-        label_scanned = status.get('label', False)
-        packing_scanned = status.get('packing', False)
-        dispatch_scanned = status.get('dispatch', False)
-        cancelled = status.get('cancelled', False)
-        pending = status.get('pending', False)
-        
-        # Determine Stage (EXACTLY matching frontend getCurrentStage logic)
-        if cancelled:
-            stage = 'Dispatch Cancelled'
-        elif dispatch_scanned:
-            stage = 'Dispatch'
-        # Dispatch Pending: label = true, packing = true, pending = true
-        elif label_scanned and packing_scanned and pending:
-            stage = 'Dispatch Pending'
-        elif packing_scanned:
-            stage = 'Packing'
-        # Packing Hold: label = true, pending = true (but packing = false)
-        elif label_scanned and pending:
-            stage = 'Packing Hold'
-        elif label_scanned:
-            stage = 'Packing Pending'
-        else:
-            stage = 'Label'
-        
-        # Determine Status (EXACTLY matching frontend getCurrentStatusWithPackingPending logic)
-        if cancelled:
-            current_status = 'Cancelled'
-        elif dispatch_scanned:
-            current_status = 'Dispatched'
-        # Dispatch Pending: label = true, packing = true, pending = true
-        elif label_scanned and packing_scanned and pending:
-            current_status = 'Dispatch Pending'
-        elif packing_scanned:
-            current_status = 'Packing Scanned'
-        # Packing Hold: label = true, pending = true (but packing = false)
-        elif label_scanned and pending:
-            current_status = 'Packing Hold'
-        elif label_scanned:
-            current_status = 'Packing Pending Shipment'
-        else:
-            current_status = 'Label yet to Scan'
-        
-        return stage, current_status
+        return stage_status_from_flags(
+            bool(status.get('label', False)),
+            bool(status.get('packing', False)),
+            bool(status.get('dispatch', False)),
+            bool(status.get('pending', False)),
+            bool(status.get('cancelled', False))
+        )
 
-    def get_frontend_data(self):
+    def _get_latest_scan_info(self, tracker_data):
+        """Stage and status of a tracker record carrying its flags under 'status'"""
+        return self.get_stage_and_status_from_flags(tracker_data.get('status') or {})
+
+    def get_frontend_data(self, all_tracker_data: Optional[Dict[str, Any]] = None):
         """Get the exact data that the frontend shows - no modifications"""
         logger.info("📊 Getting frontend data...")
         
         try:
-            # Get the exact same data that the frontend uses
+            # Get the exact same data that the frontend uses, reusing tracker data the caller already has
             all_status = firestore_service.get_all_tracker_status()
-            all_data = firestore_service.get_all_tracker_data()
+            if all_tracker_data is None:
+                all_data = firestore_service.get_all_tracker_data(TRACKER_SHEET_FIELDS)
+            else:
+                all_data = all_tracker_data
             
             trackers = []
             # Use the same logic as the backend API
@@ -163,7 +222,7 @@ class GoogleSheetsService:
             logger.error(f"❌ Error getting frontend data: {e}")
             return []
 
-    def simple_paste_to_sheets(self):
+    def simple_paste_to_sheets(self, all_tracker_data: Optional[Dict[str, Any]] = None):
         """Simple paste - no modifications, just paste what frontend shows"""
         logger.info("🔄 Simple Paste to Google Sheets (No Modifications)")
         
@@ -173,7 +232,7 @@ class GoogleSheetsService:
             self.initialize()
             
             # Get frontend data
-            trackers = self.get_frontend_data()
+            trackers = self.get_frontend_data(all_tracker_data)
             
             if not trackers:
                 logger.error("❌ No tracker data found")
@@ -188,21 +247,6 @@ class GoogleSheetsService:
             logger.info(f"📊 Opened spreadsheet: {spreadsheet.title}")
             logger.info(f"📋 Using worksheet: {self.worksheet_name}")
             
-            # Clear all existing data
-            logger.info("🧹 Clearing existing data...")
-            worksheet.clear()
-            
-            # Prepare headers
-            headers = [
-                'Tracker Code', 'Tracking ID', 'Order ID', 'Stage', 'Status',
-                'Channel', 'Courier', 'City', 'State', 'Pincode', 'Amount', 'Qty', 'Payment', 'Order Status',
-                'G-Code', 'EAN-Code', 'Product SKU', 'Listing ID', 'Invoice', 'Sub Order ID', 'Last Updated'
-            ]
-            
-            # Add headers first
-            logger.info("📋 Adding headers...")
-            worksheet.update('A1:U1', [headers])
-            
             # Prepare all data rows - NO MODIFICATIONS
             logger.info("📝 Preparing data rows (no modifications)...")
             all_rows = []
@@ -215,37 +259,34 @@ class GoogleSheetsService:
                 # Calculate stage and status from boolean flags (exact frontend logic)
                 stage, current_status = self.get_stage_and_status_from_flags(status)
                 
-                # Format amount with ₹ symbol
-                amount = details.get('amount', 0)
-                formatted_amount = f"₹{amount}" if amount else "₹0"
-                
-                # Format last updated timestamp
-                last_updated = details.get('last_updated', '')
-                formatted_last_updated = "-" if not last_updated else last_updated
+                # Pull every detail field in one call, defaulting the missing ones
+                (order_id, channel_name, courier, buyer_city, buyer_state, buyer_pincode, amount,
+                 qty, payment_mode, order_status, g_code, ean_code, product_sku_code,
+                 channel_listing_id, invoice_number, sub_order_id, last_updated) = get_detail_fields({**DETAIL_DEFAULTS, **details})
                 
                 # Use the calculated stage and status
                 row_data = [
                     str(tracker['tracker_code']),  # Tracker Code
                     str(tracker['original_tracking_id']),  # Tracking ID
-                    str(details.get('order_id', '')),  # Order ID
+                    str(order_id),  # Order ID
                     stage,  # Stage (calculated from flags)
                     current_status,  # Status (calculated from flags)
-                    str(details.get('channel_name', '')),  # Channel
-                    str(details.get('courier', '')),  # Courier
-                    str(details.get('buyer_city', '')),  # City
-                    str(details.get('buyer_state', '')),  # State
-                    str(details.get('buyer_pincode', '')),  # Pincode
-                    formatted_amount,  # Amount (with ₹ symbol)
-                    str(details.get('qty', '')),  # Qty
-                    str(details.get('payment_mode', '')),  # Payment
-                    str(details.get('order_status', '')),  # Order Status
-                    str(details.get('g_code', '')),  # G-Code
-                    str(details.get('ean_code', '')),  # EAN-Code
-                    str(details.get('product_sku_code', '')),  # Product SKU
-                    str(details.get('channel_listing_id', '')),  # Listing ID
-                    str(details.get('invoice_number', '')),  # Invoice
-                    str(details.get('sub_order_id', '')),  # Sub Order ID
-                    formatted_last_updated  # Last Updated
+                    str(channel_name),  # Channel
+                    str(courier),  # Courier
+                    str(buyer_city),  # City
+                    str(buyer_state),  # State
+                    str(buyer_pincode),  # Pincode
+                    f"₹{amount}" if amount else "₹0",  # Amount (with ₹ symbol)
+                    str(qty),  # Qty
+                    str(payment_mode),  # Payment
+                    str(order_status),  # Order Status
+                    str(g_code),  # G-Code
+                    str(ean_code),  # EAN-Code
+                    str(product_sku_code),  # Product SKU
+                    str(channel_listing_id),  # Listing ID
+                    str(invoice_number),  # Invoice
+                    str(sub_order_id),  # Sub Order ID
+                    last_updated or "-"  # Last Updated
                 ]
                 all_rows.append(row_data)
             
@@ -255,35 +296,38 @@ class GoogleSheetsService:
                 
                 # Calculate the range for all data
                 end_row = len(all_rows) + 1  # +1 for headers
-                paste_range = f"A2:U{end_row}"
+                paste_range = f"A2:{LAST_COLUMN}{end_row}"
                 
-                # Paste all data at once
-                worksheet.update(paste_range, all_rows)
+                # Clear the sheet columns
+                logger.info("🧹 Clearing existing data...")
+                spreadsheet.batch_update({
+                    "requests": [
+                        {
+                            "updateCells": {
+                                "range": {"sheetId": worksheet.id, "startColumnIndex": 0, "endColumnIndex": len(HEADERS)},
+                                "fields": "userEnteredValue"
+                            }
+                        }
+                    ]
+                })
                 
-                logger.info(f"✅ Successfully pasted {len(all_rows)} rows")
-                logger.info(f"📊 Data range: A2:U{end_row}")
-                
-                # Verify the paste
-                all_values = worksheet.get_all_values()
-                logger.info(f"✅ Verified: {len(all_values)} total rows in sheet")
-                logger.info(f"📋 Headers: {len(all_values[0]) if all_values else 0} columns")
-                logger.info(f"📊 Data: {len(all_values) - 1 if len(all_values) > 1 else 0} rows")
+                # Paste headers and all data in a single request
+                sheet_name = worksheet.title.replace("'", "''")
+                response = spreadsheet.values_batch_update({
+                    "valueInputOption": "RAW",
+                    "data": [
+                        {"range": f"'{sheet_name}'!{HEADER_RANGE}", "values": [HEADERS]},
+                        {"range": f"'{sheet_name}'!{paste_range}", "values": all_rows}
+                    ]
+                })
                 
-                # Show sample data
-                if len(all_values) > 1:
-                    logger.info("📋 Sample data (first row):")
-                    first_row = all_values[1]
-                    for i, value in enumerate(first_row[:5], 1):
-                        logger.info(f"   Column {i}: {value}")
+                logger.info(f"✅ Successfully pasted {len(all_rows)} rows")
                 
-                # Disable text wrapping
-                try:
-                    worksheet.format(f'A1:U{end_row}', {
-                        "wrapStrategy": "CLIP"
-                    })
-                    logger.info("📄 Disabled text wrapping")
-                except Exception as wrap_error:
-                    logger.warning(f"⚠️ Could not disable text wrapping: {wrap_error}")
+                # Disable text wrapping (best effort)
+                disable_text_wrapping(spreadsheet, worksheet, end_row)
+                logger.info(f"📊 Data range: {paste_range}")
+                # The write response reports what landed, so the sheet is not re-downloaded
+                logger.info(f"✅ Sheets confirmed {response.get('totalUpdatedRows', 0)} rows written (including headers)")
                 
                 logger.info(f"🎉 Simple paste completed successfully!")
                 logger.info(f"📅 Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -300,10 +344,11 @@ class GoogleSheetsService:
             logger.error(f"🔍 Full traceback: {traceback.format_exc()}")
             return False
 
-    def sync_all_tracker_data(self, all_tracker_data: Dict[str, Any]) -> bool:
+    def sync_all_tracker_data(self, all_tracker_data: Optional[Dict[str, Any]] = None) -> bool:
         """Sync all tracker data to Google Sheets - EXACT SAME AS simple_paste.py"""
-        # This method now just calls the simple_paste_to_sheets method
-        return self.simple_paste_to_sheets()
+        # This method now just calls the simple_paste_to_sheets method; without
+        # all_tracker_data the tracker data is read from Firestore
+        return self.simple_paste_to_sheets(all_tracker_data)
 
 # Create singleton instance
 gsheets_service = GoogleSheetsService() 
\ No newline at end of file
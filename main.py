@@ -15,13 +15,17 @@ import uuid
 import asyncio
 import threading
 import time
+import logging
 
 # Import Firestore service
 from app.services.firestore_service import firestore_service
 from app.services.gsheets_service import gsheets_service
 from app.core.config import settings
+from app.core.responses import OrjsonResponse
 
-app = FastAPI(title="Fulfillment Tracking API", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Fulfillment Tracking API", version="1.0.0", default_response_class=OrjsonResponse)
 
 @app.on_event("startup")
 async def startup_event():
@@ -2247,8 +2251,7 @@ async def get_recent_label_scans(page: int = 1, limit: int = 20):
         all_tracker_data = firestore_service.get_all_tracker_data()
         uploaded_trackers = firestore_service.get_uploaded_trackers()
         
-        # Debug: Print scan count
-        print(f"DEBUG: Found {len(label_scans)} label scans")
+        logger.debug("Found %d label scans", len(label_scans))
         
         for scan in label_scans[offset:offset + limit]:
             # Get tracker_code from scan data, fallback to tracking_id if not available
@@ -2272,8 +2275,7 @@ async def get_recent_label_scans(page: int = 1, limit: int = 20):
                 except:
                     scan_time = scan_time
             
-            # Debug: Print scan details
-            print(f"DEBUG: Processing scan - ID: {scan.get('id', '')}, Time: {scan_time}, Status: {scan_status}")
+            logger.debug("Processing scan - ID: %s, Time: %s, Status: %s", scan.get('id', ''), scan_time, scan_status)
             
             recent_scans.append({
                 "id": str(scan.get('id', '')),
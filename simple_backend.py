@@ -6,13 +6,37 @@ Uses only local file storage (data.json) - No Google Sheets integration
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
-import json
+import orjson
 import os
+import asyncio
+import heapq
+import logging
+import threading
+from collections import Counter, deque
+from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 
-app = FastAPI(title="Fulfillment Tracking API", version="1.0.0")
+from app.core.responses import OrjsonResponse
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load persisted data off the event loop and run the snapshot task"""
+    await asyncio.to_thread(load_data)
+    snapshot_task = asyncio.create_task(snapshot_periodically())
+    yield
+    snapshot_task.cancel()
+    # Snapshot any unsaved changes before exiting
+    if scan_log_pending or snapshot_dirty:
+        save_data()
+
+app = FastAPI(title="Fulfillment Tracking API", version="1.0.0", default_response_class=OrjsonResponse, lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -54,22 +78,340 @@ class TrackerData(BaseModel):
 class TrackerDataUpload(BaseModel):
     trackers: List[TrackerData]
 
-# Global data storage
-scans_db = []
+# Only the most recent scans are kept in memory; full history lives in the scan log
+RECENT_SCANS_LIMIT = 1000
+
+class ScanRecord:
+    """Compact in-memory form of a scan record held in the recent scans windows"""
+    __slots__ = ('id', 'tracker_code', 'tracking_id', 'scan_type', 'sku_details', 'product_code', 'timestamp', 'status')
+    
+    def __init__(self, id: str, tracker_code: str, tracking_id: str, scan_type: str,
+                 timestamp: str, status: str, sku_details: Optional[dict] = None,
+                 product_code: Optional[str] = None):
+        self.id = id
+        self.tracker_code = tracker_code
+        self.tracking_id = tracking_id
+        self.scan_type = scan_type
+        self.sku_details = sku_details
+        self.product_code = product_code
+        self.timestamp = timestamp
+        self.status = status
+    
+    @classmethod
+    def from_dict(cls, record: dict) -> 'ScanRecord':
+        """Build from a scan record as logged, snapshotted or returned by the API"""
+        get = record.get
+        return cls(
+            str(get('id', '')), get('tracker_code', ''), get('tracking_id', ''), get('scan_type', 'label'),
+            get('timestamp', ''), get('status', ''), get('sku_details'), get('product_code')
+        )
+    
+    def to_dict(self) -> dict:
+        """The scan record as stored in snapshots and the scan log"""
+        record = {
+            "id": self.id,
+            "tracker_code": self.tracker_code,
+            "tracking_id": self.tracking_id,
+            "scan_type": self.scan_type
+        }
+        if self.sku_details is not None:
+            record["sku_details"] = self.sku_details
+        if self.product_code is not None:
+            record["product_code"] = self.product_code
+        record["timestamp"] = self.timestamp
+        record["status"] = self.status
+        return record
+
+# Global data storage; tracker_status maps tracker codes to packed scan flags
+scans_db = deque(maxlen=RECENT_SCANS_LIMIT)
+# Recent scans partitioned by scan type; packing also holds packing_dual scans
+recent_scans_by_type = {
+    "label": deque(maxlen=RECENT_SCANS_LIMIT),
+    "packing": deque(maxlen=RECENT_SCANS_LIMIT),
+    "dispatch": deque(maxlen=RECENT_SCANS_LIMIT)
+}
 tracker_status = {}
 uploaded_trackers = []
 tracker_data = {}
 tracker_scan_count = {}
 tracker_scan_progress = {}
 
+# Scan records are appended to a log; snapshots record how far into it they reach
+DATA_FILE = 'data.json'
+SCAN_LOG_FILE = 'scans.log.jsonl'
+SNAPSHOT_INTERVAL_SECONDS = 60
+scan_log_pending = 0
+# Changes that are not logged (uploads, clears) mark the state dirty and are
+# flushed to a snapshot within SNAPSHOT_FLUSH_SECONDS
+SNAPSHOT_FLUSH_SECONDS = 1
+snapshot_dirty = False
+# Last issued scan ID
+scan_seq = 0
+# Snapshots are encoded on the event loop but may be written from a worker thread;
+# the lock serializes writers and the generation keeps an older snapshot from
+# replacing a newer one
+snapshot_lock = threading.Lock()
+snapshot_generation = 0
+written_snapshot_generation = 0
+
+# Scan flags packed into each tracker_status value
+LABEL_BIT = 1
+PACKING_BIT = 2
+DISPATCH_BIT = 4
+SCAN_TYPE_BITS = {"label": LABEL_BIT, "packing": PACKING_BIT, "dispatch": DISPATCH_BIT}
+
+# Secondary index: upper-cased shipment_tracker -> tracker codes sharing it, sorted by channel_id
+shipment_index = {}
+# SKU view of each tracker as returned by get_trackers_by_tracking_id
+tracker_view_cache = {}
+# Upper-cased G-Code/EAN-Code accepted by the packing dual scan, per tracker
+tracker_product_codes = {}
+# Courier and shipment_tracker of each tracker, as read by the platform statistics
+tracker_couriers = {}
+tracker_shipment_trackers = {}
+# Recent-scans row of each tracker with its static fields filled in; copied per row
+recent_row_templates = {}
+# Number of tracker keys already issued per shipment_tracker (first key suffix to try)
+shipment_suffix_count = {}
+# Occurrences of each code in uploaded_trackers (which may hold duplicates)
+uploaded_trackers_count = Counter()
+# Number of uploaded_trackers entries per tracker_status bit pattern, for O(1) stats
+status_counts = [0] * 8
+# Number of uploaded_trackers entries per (exact) shipment_tracker
+shipment_tracker_counts = {}
+# Shipment trackers with more than one uploaded entry (Multi-SKU orders)
+multi_sku_tracking_ids = set()
+# Uploaded entries per (courier, is Multi-SKU, status bits) group, for the platform statistics
+platform_groups = Counter()
+# First position of each code in uploaded_trackers
+tracker_first_upload = {}
+# Per courier, a min-heap of (first upload position, tracker code) ordering couriers
+# with equal totals by first appearance; entries of trackers that have since moved
+# to another courier are dropped when they reach the top
+courier_first_uploads = {}
+# Revision of the data behind the stats endpoints; bumped on every upload, scan and reload
+stats_rev = 0
+# Serialized stats bodies keyed by endpoint (and scan mask): (stats_rev, bytes)
+stats_cache = {}
+# Memoized get_trackers_by_tracking_id results, keyed by upper-cased tracking ID
+trackers_cache = {}
+
+def index_tracker(tracker_code: str, data: dict):
+    """Register a tracker code under its (case-insensitive) shipment tracker"""
+    global stats_rev
+    stats_rev += 1
+    tracker_view_cache[tracker_code] = {
+        'tracker_code': tracker_code,
+        'channel_id': data.get('channel_id'),
+        'g_code': data.get('g_code'),
+        'ean_code': data.get('ean_code'),
+        'product_sku_code': data.get('product_sku_code'),
+        'qty': data.get('qty', 1)
+    }
+    tracker_product_codes[tracker_code] = frozenset(
+        code.upper() for code in (data.get('g_code'), data.get('ean_code')) if code
+    )
+    old_group = platform_group(tracker_code)
+    tracker_couriers[tracker_code] = data.get('courier', 'Unknown')
+    tracker_shipment_trackers[tracker_code] = data.get('shipment_tracker', '')
+    move_platform_group(tracker_code, old_group)
+    if tracker_couriers[tracker_code] != old_group[0]:
+        push_courier_first_upload(tracker_code)
+    recent_row_templates[tracker_code] = make_recent_row_template(tracker_code, data)
+    
+    shipment_key = (data.get('shipment_tracker') or '').upper()
+    codes = shipment_index.setdefault(shipment_key, [])
+    codes.append(tracker_code)
+    # Keep SKUs ordered by channel_id (stable, so ties keep upload order)
+    codes.sort(key=lambda code: tracker_view_cache[code]['channel_id'] or '')
+    trackers_cache.pop(shipment_key, None)
+    
+    # Entries uploaded before the tracker had data now belong to its shipment
+    count_shipment_tracker(data.get('shipment_tracker'), uploaded_trackers_count.get(tracker_code, 0))
+
+def make_recent_row_template(tracker_code: str, data: dict) -> dict:
+    """Recent-scans row for a tracker with the per-scan fields left empty"""
+    return {
+        "id": None,
+        "tracking_id": data.get('shipment_tracker', tracker_code),
+        "platform": data.get('channel_name', 'Unknown'),
+        "last_scan": None,
+        "scan_status": None,
+        "distribution": "Multi SKU" if data.get('shipment_tracker', '') in multi_sku_tracking_ids else "Single SKU",
+        "scan_time": None,
+        "amount": data.get('amount', 0),
+        "buyer_city": data.get('buyer_city', 'Unknown'),
+        "courier": data.get('courier', 'Unknown')
+    }
+
+def count_shipment_tracker(shipment_tracker: str, occurrences: int):
+    """Add uploaded entries to a shipment tracker, flagging it (and its rows) Multi-SKU past one"""
+    if not shipment_tracker or not occurrences:
+        return
+    count = shipment_tracker_counts.get(shipment_tracker, 0) + occurrences
+    shipment_tracker_counts[shipment_tracker] = count
+    if count > 1 and shipment_tracker not in multi_sku_tracking_ids:
+        # Move the shipment's trackers to the Multi-SKU platform groups
+        codes = [
+            code for code in shipment_index.get(shipment_tracker.upper(), ())
+            if tracker_shipment_trackers.get(code) == shipment_tracker
+        ]
+        old_groups = [platform_group(code) for code in codes]
+        multi_sku_tracking_ids.add(shipment_tracker)
+        for code, old_group in zip(codes, old_groups):
+            move_platform_group(code, old_group)
+            recent_row_templates[code]["distribution"] = "Multi SKU"
+
+def platform_group(tracker_code: str) -> tuple:
+    """Platform statistics group of a tracker: (courier, is Multi-SKU, status bits)"""
+    return (
+        tracker_couriers.get(tracker_code, 'Unknown'),
+        tracker_shipment_trackers.get(tracker_code, '') in multi_sku_tracking_ids,
+        tracker_status.get(tracker_code, 0)
+    )
+
+def add_to_platform_group(group: tuple, occurrences: int):
+    """Adjust the uploaded entry count of a platform group, dropping emptied groups"""
+    count = platform_groups[group] + occurrences
+    if count:
+        platform_groups[group] = count
+    else:
+        del platform_groups[group]
+
+def push_courier_first_upload(tracker_code: str):
+    """Record an uploaded tracker's first position under its current courier"""
+    position = tracker_first_upload.get(tracker_code)
+    if position is not None:
+        courier = tracker_couriers.get(tracker_code, 'Unknown')
+        heapq.heappush(courier_first_uploads.setdefault(courier, []), (position, tracker_code))
+
+def couriers_by_first_upload() -> list:
+    """Couriers in order of their first entry in uploaded_trackers"""
+    firsts = []
+    for courier, heap in courier_first_uploads.items():
+        while heap and tracker_couriers.get(heap[0][1], 'Unknown') != courier:
+            heapq.heappop(heap)
+        if heap:
+            firsts.append((heap[0][0], courier))
+    firsts.sort(key=lambda first: first[0])
+    return [courier for _, courier in firsts]
+
+def move_platform_group(tracker_code: str, old_group: tuple):
+    """Move a tracker's uploaded entries from old_group to its current group"""
+    occurrences = uploaded_trackers_count.get(tracker_code, 0)
+    new_group = platform_group(tracker_code)
+    if occurrences and new_group != old_group:
+        add_to_platform_group(old_group, -occurrences)
+        add_to_platform_group(new_group, occurrences)
+
+def status_bits(status: dict) -> int:
+    """Pack a {"label", "packing", "dispatch"} flag dict into scan bits"""
+    bits = 0
+    for scan_type, bit in SCAN_TYPE_BITS.items():
+        if status.get(scan_type, False):
+            bits |= bit
+    return bits
+
+def status_view(bits: int) -> dict:
+    """Unpack scan bits into the {"label", "packing", "dispatch"} flags returned by the API"""
+    return {
+        "label": bool(bits & LABEL_BIT),
+        "packing": bool(bits & PACKING_BIT),
+        "dispatch": bool(bits & DISPATCH_BIT)
+    }
+
+def mark_scanned(tracker_code: str, scan_type: str):
+    """Flag a tracker as scanned for scan_type in tracker_status"""
+    global stats_rev
+    old_bits = tracker_status.get(tracker_code, 0)
+    new_bits = old_bits | SCAN_TYPE_BITS[scan_type]
+    if new_bits != old_bits:
+        old_group = platform_group(tracker_code)
+        tracker_status[tracker_code] = new_bits
+        move_platform_group(tracker_code, old_group)
+        stats_rev += 1
+        # Move every uploaded occurrence of the tracker to its new pattern
+        occurrences = uploaded_trackers_count.get(tracker_code, 0)
+        status_counts[old_bits] -= occurrences
+        status_counts[new_bits] += occurrences
+
+def register_uploaded(tracker_codes: list):
+    """Count newly appended uploaded_trackers entries in the stats counters"""
+    global stats_rev
+    stats_rev += 1
+    # The codes were just appended to uploaded_trackers
+    start = len(uploaded_trackers) - len(tracker_codes)
+    for position, tracker_code in enumerate(tracker_codes, start):
+        if tracker_code not in tracker_first_upload:
+            tracker_first_upload[tracker_code] = position
+            push_courier_first_upload(tracker_code)
+        uploaded_trackers_count[tracker_code] += 1
+        status_counts[tracker_status.get(tracker_code, 0)] += 1
+        add_to_platform_group(platform_group(tracker_code), 1)
+        count_shipment_tracker(tracker_data.get(tracker_code, {}).get('shipment_tracker'), 1)
+
+def count_trackers_with(bit: int) -> int:
+    """Number of uploaded_trackers entries with the given scan bit set"""
+    return sum(count for bits, count in enumerate(status_counts) if bits & bit)
+
+def record_scan(scan_record: dict):
+    """Add a scan record to the recent scans and its per-type window"""
+    scan = ScanRecord.from_dict(scan_record)
+    scans_db.append(scan)
+    scan_type = scan.scan_type
+    recent_scans_by_type["packing" if scan_type == "packing_dual" else scan_type].append(scan)
+
+def rebuild_indexes():
+    """Rebuild in-memory lookup indexes from tracker_data and scans_db"""
+    global shipment_index, shipment_suffix_count, uploaded_trackers_count, status_counts, stats_rev
+    stats_rev += 1
+    trackers_cache.clear()
+    tracker_view_cache.clear()
+    tracker_product_codes.clear()
+    tracker_couriers.clear()
+    tracker_shipment_trackers.clear()
+    recent_row_templates.clear()
+    shipment_index = {}
+    shipment_suffix_count = {}
+    uploaded_trackers_count = Counter()
+    status_counts = [0] * 8
+    shipment_tracker_counts.clear()
+    multi_sku_tracking_ids.clear()
+    platform_groups.clear()
+    tracker_first_upload.clear()
+    courier_first_uploads.clear()
+    for tracker_code, data in tracker_data.items():
+        index_tracker(tracker_code, data)
+        shipment_tracker = data.get('shipment_tracker')
+        shipment_suffix_count[shipment_tracker] = shipment_suffix_count.get(shipment_tracker, 0) + 1
+    # Counted after indexing so each uploaded entry is attributed exactly once
+    register_uploaded(uploaded_trackers)
+    for recent in recent_scans_by_type.values():
+        recent.clear()
+    for scan in scans_db:
+        scan_type = scan.scan_type
+        recent_scans_by_type["packing" if scan_type == "packing_dual" else scan_type].append(scan)
+
 def load_data():
-    """Load data from JSON file"""
-    global scans_db, tracker_status, uploaded_trackers, tracker_data, tracker_scan_count, tracker_scan_progress
+    """Load the data.json snapshot and replay the scan log on top of it"""
+    global scans_db, tracker_status, uploaded_trackers, tracker_data, tracker_scan_count, tracker_scan_progress, scan_seq
+    scan_log_offset = 0
     try:
-        with open('data.json', 'r') as f:
-            data = json.load(f)
-            scans_db = data.get('scans', [])
-            tracker_status = data.get('tracker_status', {})
+        with open(DATA_FILE, 'rb') as f:
+            data = orjson.loads(f.read())
+            scans = data.get('scans', [])
+            scans_db = deque(
+                (ScanRecord.from_dict(scan) for scan in scans[-RECENT_SCANS_LIMIT:]),
+                maxlen=RECENT_SCANS_LIMIT
+            )
+            # Older snapshots hold every scan and issued IDs as len(scans) + 1
+            scan_seq = data.get('scan_seq', len(scans))
+            scan_log_offset = data.get('scan_log_offset', 0)
+            # Older snapshots store each status as a flag dict
+            tracker_status = {
+                tracker_code: status if isinstance(status, int) else status_bits(status)
+                for tracker_code, status in data.get('tracker_status', {}).items()
+            }
             uploaded_trackers = data.get('uploaded_trackers', [])
             tracker_data = data.get('tracker_data', {})
             tracker_scan_count = data.get('tracker_scan_count', {})
@@ -77,43 +419,152 @@ def load_data():
     except FileNotFoundError:
         # Initialize with empty data if file doesn't exist
         pass
+    rebuild_indexes()
+    replay_scan_log(scan_log_offset)
 
-def save_data():
-    """Save data to JSON file"""
+def encode_snapshot() -> tuple:
+    """Serialize the state and the scan log offset it covers as (generation, bytes)"""
+    global snapshot_generation
+    try:
+        scan_log_offset = os.path.getsize(SCAN_LOG_FILE)
+    except FileNotFoundError:
+        scan_log_offset = 0
     data = {
-        'scans': scans_db,
+        'scans': [scan.to_dict() for scan in scans_db],
+        'scan_seq': scan_seq,
+        'scan_log_offset': scan_log_offset,
         'tracker_status': tracker_status,
         'uploaded_trackers': uploaded_trackers,
         'tracker_data': tracker_data,
         'tracker_scan_count': tracker_scan_count,
         'tracker_scan_progress': tracker_scan_progress
     }
-    with open('data.json', 'w') as f:
-        json.dump(data, f, indent=2)
+    snapshot_generation += 1
+    return snapshot_generation, orjson.dumps(data)
+
+def write_snapshot(generation: int, snapshot: bytes):
+    """Atomically replace data.json with an encoded snapshot unless a newer one was written"""
+    global written_snapshot_generation
+    with snapshot_lock:
+        if generation <= written_snapshot_generation:
+            return
+        tmp_file = DATA_FILE + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(snapshot)
+        os.replace(tmp_file, DATA_FILE)
+        written_snapshot_generation = generation
+
+def save_data():
+    """Write a full snapshot to data.json covering the scan log up to its current end"""
+    global scan_log_pending, snapshot_dirty
+    write_snapshot(*encode_snapshot())
+    
+    # Every logged scan is now part of the snapshot; the log is kept as history
+    scan_log_pending = 0
+    snapshot_dirty = False
+
+def mark_dirty():
+    """Schedule a snapshot of changes that are not recorded in the scan log"""
+    global snapshot_dirty
+    snapshot_dirty = True
+
+def next_scan_id() -> str:
+    """Issue the next monotonically increasing scan ID"""
+    global scan_seq
+    scan_seq += 1
+    return str(scan_seq)
+
+def append_scan_log(scan_records: list):
+    """Append scan records to the write-ahead log in a single write"""
+    global scan_log_pending
+    with open(SCAN_LOG_FILE, 'ab') as f:
+        f.write(b''.join(orjson.dumps(record) + b'\n' for record in scan_records))
+    scan_log_pending += len(scan_records)
+
+def apply_scan_record(scan_record: dict):
+    """Re-apply a logged scan record to the in-memory state"""
+    global scan_seq
+    tracker_code = scan_record['tracker_code']
+    tracking_id = scan_record['tracking_id']
+    scan_type = scan_record['scan_type']
+    status_key = "packing" if scan_type == "packing_dual" else scan_type
+    
+    record_scan(scan_record)
+    scan_seq = max(scan_seq, int(scan_record['id']))
+    mark_scanned(tracker_code, status_key)
+    
+    if scan_type != "packing_dual":
+        counts = tracker_scan_count.setdefault(tracking_id, {})
+        counts[scan_type] = counts.get(scan_type, 0) + 1
+    
+    # Progress is re-seeded from tracker_status on next access
+    tracker_scan_progress.get(tracking_id.upper(), {}).pop(status_key, None)
+
+def replay_scan_log(offset: int = 0):
+    """Replay scans logged after the given log offset (the last snapshot)"""
+    global scan_log_pending
+    try:
+        with open(SCAN_LOG_FILE, 'rb+') as f:
+            f.seek(offset)
+            good_offset = offset
+            line = b''
+            for line in iter(f.readline, b''):
+                if line.strip():
+                    try:
+                        scan_record = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        # Only the final record can be torn by a crash mid-append
+                        if f.read().strip():
+                            raise
+                        logger.warning("Truncating partial record at offset %d of %s", good_offset, SCAN_LOG_FILE)
+                        f.truncate(good_offset)
+                        return
+                    apply_scan_record(scan_record)
+                    scan_log_pending += 1
+                good_offset = f.tell()
+            # Terminate a complete final record so the next append starts a new line
+            if line and not line.endswith(b'\n'):
+                f.write(b'\n')
+    except FileNotFoundError:
+        pass
+
+async def snapshot_periodically():
+    """Flush dirty state promptly and fold the scan log into a snapshot at a fixed interval"""
+    global scan_log_pending, snapshot_dirty
+    since_snapshot = 0
+    while True:
+        await asyncio.sleep(SNAPSHOT_FLUSH_SECONDS)
+        since_snapshot += SNAPSHOT_FLUSH_SECONDS
+        if snapshot_dirty or (scan_log_pending and since_snapshot >= SNAPSHOT_INTERVAL_SECONDS):
+            # Scans and uploads made during the write count towards the next snapshot
+            pending = scan_log_pending
+            scan_log_pending = 0
+            snapshot_dirty = False
+            try:
+                # Encode on the loop for a consistent view, write the file off it
+                snapshot = encode_snapshot()
+                await asyncio.to_thread(write_snapshot, *snapshot)
+            except Exception:
+                # Keep the task alive and retry on the next tick
+                logger.exception("Failed to write snapshot to %s", DATA_FILE)
+                scan_log_pending += pending
+                snapshot_dirty = True
+                continue
+            since_snapshot = 0
 
 def get_trackers_by_tracking_id(tracking_id: str):
     """Get all trackers that belong to the same tracking ID (case-insensitive)"""
-    trackers = []
-    
-    # Convert tracking_id to uppercase for case-insensitive matching
     tracking_id_upper = tracking_id.upper()
+    cached = trackers_cache.get(tracking_id_upper)
+    if cached is not None:
+        return cached
     
-    # Find all trackers with the exact tracking_id (case-insensitive)
-    for tracker_code, data in tracker_data.items():
-        # Convert stored shipment_tracker to uppercase for comparison
-        stored_tracker = data.get('shipment_tracker', '').upper()
-        if stored_tracker == tracking_id_upper:
-            trackers.append({
-                'tracker_code': tracker_code,
-                'channel_id': data.get('channel_id'),
-                'g_code': data.get('g_code'),
-                'ean_code': data.get('ean_code'),
-                'product_sku_code': data.get('product_sku_code'),
-                'qty': data.get('qty', 1)
-            })
-    
-    # Sort by channel_id for consistent ordering
-    trackers.sort(key=lambda x: x.get('channel_id', ''))
+    # Shipment index entries are pre-sorted by channel_id
+    trackers = [tracker_view_cache[code] for code in shipment_index.get(tracking_id_upper, [])]
+    
+    # Unknown tracking IDs are not cached so mistyped scans can't grow the cache
+    if trackers:
+        trackers_cache[tracking_id_upper] = trackers
     return trackers
 
 def scan_all_trackers_for_tracking_id(tracking_id: str, scan_type: str):
@@ -124,17 +575,20 @@ def scan_all_trackers_for_tracking_id(tracking_id: str, scan_type: str):
     
     scanned_trackers = []
     scan_records = []
+    scan_bit = SCAN_TYPE_BITS[scan_type]
+    # One timestamp for the whole batch: all SKUs are scanned together
+    now_iso = datetime.now().isoformat()
     
     for tracker in trackers:
         tracker_code = tracker['tracker_code']
         
         # Check if this tracker is already scanned for this scan type
-        if tracker_code in tracker_status and tracker_status[tracker_code].get(scan_type, False):
+        if tracker_status.get(tracker_code, 0) & scan_bit:
             continue  # Skip already scanned trackers
         
         # Create scan record
         scan_record = {
-            "id": str(len(scans_db) + 1),
+            "id": next_scan_id(),
             "tracker_code": tracker_code,
             "tracking_id": tracking_id,
             "scan_type": scan_type,
@@ -144,16 +598,14 @@ def scan_all_trackers_for_tracking_id(tracking_id: str, scan_type: str):
                 "product_sku_code": tracker['product_sku_code'],
                 "channel_id": tracker['channel_id']
             },
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso,
             "status": "completed"
         }
-        scans_db.append(scan_record)
+        record_scan(scan_record)
         scan_records.append(scan_record)
         
         # Update tracker status for this specific SKU
-        if tracker_code not in tracker_status:
-            tracker_status[tracker_code] = {"label": False, "packing": False, "dispatch": False}
-        tracker_status[tracker_code][scan_type] = True
+        mark_scanned(tracker_code, scan_type)
         
         scanned_trackers.append(tracker)
     
@@ -163,8 +615,8 @@ def scan_all_trackers_for_tracking_id(tracking_id: str, scan_type: str):
     tracker_scan_count[tracking_id][scan_type] = tracker_scan_count[tracking_id].get(scan_type, 0) + len(scanned_trackers)
     
     # Update progress for all scanned trackers
-    for _ in range(len(scanned_trackers)):
-        update_scan_progress(tracking_id, scan_type)
+    if scanned_trackers:
+        update_scan_progress(tracking_id, scan_type, len(scanned_trackers))
     
     # Get updated progress
     progress = get_scan_progress(tracking_id, scan_type)
@@ -178,82 +630,59 @@ def scan_all_trackers_for_tracking_id(tracking_id: str, scan_type: str):
 
 def get_next_sku_to_scan(tracking_id: str, scan_type: str):
     """Get the next SKU to scan for a tracking ID"""
-    trackers = get_trackers_by_tracking_id(tracking_id)
-    if not trackers:
-        return None
-    
-    # Sort trackers by channel_id for consistent ordering
-    trackers.sort(key=lambda x: x.get('channel_id', ''))
-    
-    # Find the next un-scanned tracker for this scan type
-    for tracker in trackers:
-        tracker_code = tracker['tracker_code']
-        
-        # Check if this tracker is already scanned for this scan type
-        if tracker_code in tracker_status:
-            if not tracker_status[tracker_code].get(scan_type, False):
-                # This tracker hasn't been scanned for this scan type yet
-                return tracker
-        else:
-            # Tracker status doesn't exist, so it hasn't been scanned
-            return tracker
+    # Walk the shipment index directly; it is already ordered by channel_id
+    scan_bit = SCAN_TYPE_BITS[scan_type]
+    for tracker_code in shipment_index.get(tracking_id.upper(), ()):
+        if not tracker_status.get(tracker_code, 0) & scan_bit:
+            return tracker_view_cache[tracker_code]
     
     # All trackers have been scanned for this scan type
     return None
 
-def update_scan_progress(tracking_id: str, scan_type: str):
-    """Update scan progress for a tracking ID"""
-    if tracking_id not in tracker_scan_progress:
-        tracker_scan_progress[tracking_id] = {}
-    
-    if scan_type not in tracker_scan_progress[tracking_id]:
-        tracker_scan_progress[tracking_id][scan_type] = {"scanned": 0, "total": 0}
-    
-    # Get all trackers for this tracking ID
-    trackers = get_trackers_by_tracking_id(tracking_id)
-    total = len(trackers)
-    
-    # Count scanned trackers
-    scanned = 0
-    for tracker in trackers:
-        tracker_code = tracker['tracker_code']
-        if tracker_code in tracker_status and tracker_status[tracker_code].get(scan_type, False):
-            scanned += 1
-    
-    tracker_scan_progress[tracking_id][scan_type] = {"scanned": scanned, "total": total}
+def update_scan_progress(tracking_id: str, scan_type: str, scanned: int = 1):
+    """Record newly scanned SKUs in the scan progress for a tracking ID"""
+    progress = tracker_scan_progress.setdefault(tracking_id.upper(), {})
+    
+    if scan_type not in progress:
+        # First scan for this type: seed the counter from tracker_status,
+        # which already reflects the SKUs that were just scanned
+        get_scan_progress(tracking_id, scan_type)
+        return
+    
+    progress[scan_type]["scanned"] += scanned
+    progress[scan_type]["total"] = len(shipment_index.get(tracking_id.upper(), []))
 
 def get_scan_progress(tracking_id: str, scan_type: str) -> dict:
     """Get scan progress for a tracking ID"""
-    if tracking_id not in tracker_scan_progress:
-        tracker_scan_progress[tracking_id] = {}
+    progress = tracker_scan_progress.setdefault(tracking_id.upper(), {})
     
-    if scan_type not in tracker_scan_progress[tracking_id]:
+    if scan_type not in progress:
         # Initialize progress
         trackers = get_trackers_by_tracking_id(tracking_id)
         total = len(trackers)
+        scan_bit = SCAN_TYPE_BITS[scan_type]
         scanned = 0
         for tracker in trackers:
-            tracker_code = tracker['tracker_code']
-            if tracker_code in tracker_status and tracker_status[tracker_code].get(scan_type, False):
+            if tracker_status.get(tracker['tracker_code'], 0) & scan_bit:
                 scanned += 1
-        tracker_scan_progress[tracking_id][scan_type] = {"scanned": scanned, "total": total}
+        progress[scan_type] = {"scanned": scanned, "total": total}
+    else:
+        # SKUs uploaded later for the same tracking ID only change the total
+        progress[scan_type]["total"] = len(shipment_index.get(tracking_id.upper(), []))
     
-    return tracker_scan_progress[tracking_id][scan_type]
+    return progress[scan_type]
 
-def generate_unique_tracker_key(base_tracker_code: str, existing_keys: list) -> str:
-    """Generate a unique tracker key for multi-SKU orders"""
-    if base_tracker_code not in existing_keys:
-        return base_tracker_code
-    
-    # Find the next available suffix
-    counter = 1
-    while f"{base_tracker_code}_{counter}" in existing_keys:
+def generate_unique_tracker_key(base_tracker_code: str, batch: Optional[dict] = None) -> str:
+    """Generate a unique tracker key for multi-SKU orders, avoiding keys stored or pending in batch"""
+    counter = shipment_suffix_count.get(base_tracker_code, 0)
+    tracker_key = base_tracker_code if counter == 0 else f"{base_tracker_code}_{counter}"
+    # Stored keys may skip suffixes (X, X_3) and a batch may hold a literal X_1, so
+    # probe past any key already taken
+    while tracker_key in tracker_data or (batch is not None and tracker_key in batch):
         counter += 1
-    
-    return f"{base_tracker_code}_{counter}"
-
-# Load data on startup
-load_data()
+        tracker_key = f"{base_tracker_code}_{counter}"
+    shipment_suffix_count[base_tracker_code] = counter + 1
+    return tracker_key
 
 # Basic endpoints
 @app.get("/")
@@ -274,10 +703,10 @@ async def upload_trackers(tracker_upload: TrackerUpload):
     for tracker_code in tracker_upload.tracker_codes:
         uploaded_trackers.append(tracker_code)
         # Initialize tracker status if not exists
-        if tracker_code not in tracker_status:
-            tracker_status[tracker_code] = {"label": False, "packing": False, "dispatch": False}
+        tracker_status.setdefault(tracker_code, 0)
+    register_uploaded(tracker_upload.tracker_codes)
     
-    save_data()
+    mark_dirty()
     
     return {
         "message": f"Successfully uploaded {len(tracker_upload.tracker_codes)} trackers",
@@ -290,45 +719,27 @@ async def upload_detailed_trackers(tracker_data_upload: TrackerDataUpload):
     """Upload detailed tracker data"""
     global uploaded_trackers, tracker_data
     
-    for i, tracker in enumerate(tracker_data_upload.trackers):
-        # Create a unique tracker code that preserves the original data
-        base_tracker_code = tracker.shipment_tracker
-        
-        # Check if this shipment_tracker already exists
-        existing_keys = [k for k, v in tracker_data.items() if v.get('shipment_tracker') == base_tracker_code]
-        
-        # Generate unique tracker key using helper function
-        tracker_code = generate_unique_tracker_key(base_tracker_code, existing_keys)
-        
-        # Add to uploaded trackers list
-        uploaded_trackers.append(tracker_code)
-        
-        # Store detailed tracker data with unique key
-        tracker_data[tracker_code] = {
-            "channel_id": tracker.channel_id,
-            "order_id": tracker.order_id,
-            "sub_order_id": tracker.sub_order_id,
-            "shipment_tracker": tracker.shipment_tracker,  # Keep original shipment_tracker
-            "courier": tracker.courier,
-            "channel_name": tracker.channel_name,
-            "g_code": tracker.g_code,
-            "ean_code": tracker.ean_code,
-            "product_sku_code": tracker.product_sku_code,
-            "qty": tracker.qty,
-            "amount": tracker.amount,
-            "payment_mode": tracker.payment_mode,
-            "order_status": tracker.order_status,
-            "buyer_city": tracker.buyer_city,
-            "buyer_state": tracker.buyer_state,
-            "buyer_pincode": tracker.buyer_pincode,
-            "invoice_number": tracker.invoice_number
-        }
+    batch = {}
+    
+    for tracker in tracker_data_upload.trackers:
+        # Generate a unique tracker key that preserves the original shipment_tracker
+        tracker_code = generate_unique_tracker_key(tracker.shipment_tracker, batch)
+        batch[tracker_code] = tracker.model_dump()
+    
+    # Apply the whole batch at once
+    new_codes = list(batch)
+    tracker_data.update(batch)
+    
+    for tracker_code, data in batch.items():
+        index_tracker(tracker_code, data)
         
         # Initialize tracker status if not exists
-        if tracker_code not in tracker_status:
-            tracker_status[tracker_code] = {"label": False, "packing": False, "dispatch": False}
+        tracker_status.setdefault(tracker_code, 0)
+    
+    uploaded_trackers.extend(new_codes)
+    register_uploaded(new_codes)
     
-    save_data()
+    mark_dirty()
     
     return {
         "message": f"Successfully uploaded {len(tracker_data_upload.trackers)} tracker entries",
@@ -360,7 +771,7 @@ async def process_label_scan(scan_request: ScanRequest):
     if not scan_result or scan_result["total_scanned"] == 0:
         raise HTTPException(status_code=400, detail="All SKUs for this tracking ID have been scanned")
     
-    save_data()
+    append_scan_log(scan_result["scan_records"])
     
     # Get the first scanned SKU for response (for backward compatibility)
     first_scanned = scan_result["scanned_trackers"][0] if scan_result["scanned_trackers"] else None
@@ -396,16 +807,17 @@ async def process_packing_scan(scan_request: ScanRequest):
     
     # Check if this specific tracker is already scanned
     tracker_code = next_sku['tracker_code']
-    if tracker_code in tracker_status and tracker_status[tracker_code].get("packing", False):
+    bits = tracker_status.get(tracker_code, 0)
+    if bits & PACKING_BIT:
         raise HTTPException(status_code=400, detail="This SKU has already been scanned")
     
     # Check if label scan is completed for this SKU
-    if tracker_code not in tracker_status or not tracker_status[tracker_code].get("label", False):
+    if not bits & LABEL_BIT:
         raise HTTPException(status_code=400, detail="Label scan must be completed before packing scan")
     
     # Create scan record
     scan_record = {
-        "id": str(len(scans_db) + 1),
+        "id": next_scan_id(),
         "tracker_code": tracker_code,
         "tracking_id": tracking_id,
         "scan_type": "packing",
@@ -418,10 +830,10 @@ async def process_packing_scan(scan_request: ScanRequest):
         "timestamp": datetime.now().isoformat(),
         "status": "completed"
     }
-    scans_db.append(scan_record)
+    record_scan(scan_record)
     
     # Update tracker status for this specific SKU
-    tracker_status[tracker_code]["packing"] = True
+    mark_scanned(tracker_code, "packing")
     
     # Update scan count and progress
     if tracking_id not in tracker_scan_count:
@@ -433,7 +845,7 @@ async def process_packing_scan(scan_request: ScanRequest):
     # Get updated progress
     progress = get_scan_progress(tracking_id, "packing")
     
-    save_data()
+    append_scan_log([scan_record])
     
     return {
         "message": f"Packing scan completed for SKU: {next_sku['product_sku_code']}",
@@ -471,21 +883,21 @@ async def process_packing_dual_scan(scan_request: PackingDualScanRequest):
     tracker_code = next_sku['tracker_code']
     
     # Check if already scanned
-    if tracker_code in tracker_status and tracker_status[tracker_code].get("packing", False):
+    if tracker_status.get(tracker_code, 0) & PACKING_BIT:
         raise HTTPException(status_code=400, detail="Packing scan already completed for this SKU")
     
     # Validate product code (check if it matches the tracker's product)
     g_code = next_sku['g_code']
     ean_code = next_sku['ean_code']
     
-    if product_code not in [g_code, ean_code]:
+    if product_code.upper() not in tracker_product_codes[tracker_code]:
         raise HTTPException(
             status_code=400, 
             detail=f"Product code {product_code} does not match tracker's G-Code ({g_code}) or EAN-Code ({ean_code})"
         )
     
     scan_record = {
-        "id": str(len(scans_db) + 1),
+        "id": next_scan_id(),
         "tracker_code": tracker_code,
         "tracking_id": tracking_id,
         "scan_type": "packing_dual",
@@ -493,17 +905,15 @@ async def process_packing_dual_scan(scan_request: PackingDualScanRequest):
         "timestamp": datetime.now().isoformat(),
         "status": "completed"
     }
-    scans_db.append(scan_record)
+    record_scan(scan_record)
     
     # Update tracker status
-    if tracker_code not in tracker_status:
-        tracker_status[tracker_code] = {"label": False, "packing": False, "dispatch": False}
-    tracker_status[tracker_code]["packing"] = True
+    mark_scanned(tracker_code, "packing")
     
     # Update scan progress
     update_scan_progress(tracking_id, "packing")
     
-    save_data()
+    append_scan_log([scan_record])
     
     return {
         "message": "Packing dual scan processed successfully",
@@ -532,10 +942,11 @@ async def process_dispatch_scan(scan_request: ScanRequest):
         if tracker_code not in tracker_status:
             raise HTTPException(status_code=400, detail="Label and packing scans must be completed before dispatch scan")
         
-        if not tracker_status[tracker_code].get("label", False):
+        bits = tracker_status[tracker_code]
+        if not bits & LABEL_BIT:
             raise HTTPException(status_code=400, detail="Label scan must be completed before dispatch scan")
         
-        if not tracker_status[tracker_code].get("packing", False):
+        if not bits & PACKING_BIT:
             raise HTTPException(status_code=400, detail="Packing scan must be completed before dispatch scan")
     
     # Scan all trackers for this tracking ID at once
@@ -543,7 +954,7 @@ async def process_dispatch_scan(scan_request: ScanRequest):
     if not scan_result or scan_result["total_scanned"] == 0:
         raise HTTPException(status_code=400, detail="All SKUs for this tracking ID have been scanned")
     
-    save_data()
+    append_scan_log(scan_result["scan_records"])
     
     # Get the first scanned SKU for response (for backward compatibility)
     first_scanned = scan_result["scanned_trackers"][0] if scan_result["scanned_trackers"] else None
@@ -566,7 +977,7 @@ async def process_dispatch_scan(scan_request: ScanRequest):
 @app.get("/api/v1/tracker/{tracker_code}/status")
 async def get_tracker_status(tracker_code: str):
     """Get status of a specific tracker"""
-    if tracker_code not in uploaded_trackers:
+    if tracker_code not in uploaded_trackers_count:
         return {
             "tracker_code": tracker_code,
             "status": "not_uploaded",
@@ -586,21 +997,21 @@ async def get_tracker_status(tracker_code: str):
             "next_available_scan": "label"
         }
     
-    status = tracker_status[tracker_code]
+    bits = tracker_status[tracker_code]
     next_scan = "completed"
-    if not status.get("label", False):
+    if not bits & LABEL_BIT:
         next_scan = "label"
-    elif not status.get("packing", False):
+    elif not bits & PACKING_BIT:
         next_scan = "packing"
-    elif not status.get("dispatch", False):
+    elif not bits & DISPATCH_BIT:
         next_scan = "dispatch"
     
     return {
         "tracker_code": tracker_code,
-        "status": "completed" if status.get("dispatch", False) else "in_progress",
-        "label": status.get("label", False),
-        "packing": status.get("packing", False),
-        "dispatch": status.get("dispatch", False),
+        "status": "completed" if bits & DISPATCH_BIT else "in_progress",
+        "label": bool(bits & LABEL_BIT),
+        "packing": bool(bits & PACKING_BIT),
+        "dispatch": bool(bits & DISPATCH_BIT),
         "next_available_scan": next_scan
     }
 
@@ -674,47 +1085,58 @@ async def get_tracker_scan_count(tracking_id: str):
         "skus": trackers
     }
 
+TRACKER_STREAM_BATCH_SIZE = 500
+
+async def stream_all_trackers():
+    """Yield the {"trackers": [...]} payload as JSON chunks of serialized trackers"""
+    yield b'{"trackers":['
+    
+    batch = []
+    separator = b''
+    for code in uploaded_trackers:
+        # Get the original tracking ID from tracker data
+        tracker_info = tracker_data.get(code, {})
+        original_tracking_id = tracker_info.get('shipment_tracker', code)
+        
+        bits = tracker_status.get(code, 0)
+        status = status_view(bits)
+        next_scan = "label" if not bits & LABEL_BIT else \
+                   "packing" if not bits & PACKING_BIT else \
+                   "dispatch" if not bits & DISPATCH_BIT else "completed"
+        
+        batch.append(orjson.dumps({
+            "tracker_code": code,
+            "original_tracking_id": original_tracking_id,
+            "status": status,
+            "next_available_scan": next_scan,
+            "details": tracker_info
+        }))
+        
+        if len(batch) == TRACKER_STREAM_BATCH_SIZE:
+            yield separator + b','.join(batch)
+            separator = b','
+            batch = []
+    
+    if batch:
+        yield separator + b','.join(batch)
+    yield b']}'
+
 @app.get("/api/v1/trackers/")
 async def get_all_trackers():
     """Get all trackers and their status"""
-    trackers = []
-    for code in uploaded_trackers:
-        if code in tracker_status:
-            status = tracker_status[code]
-            next_scan = "label" if not status.get("label", False) else \
-                       "packing" if not status.get("packing", False) else \
-                       "dispatch" if not status.get("dispatch", False) else "completed"
-            
-            # Get the original tracking ID from tracker data
-            tracker_info = tracker_data.get(code, {})
-            original_tracking_id = tracker_info.get('shipment_tracker', code)
-            
-            trackers.append({
-                "tracker_code": code,
-                "original_tracking_id": original_tracking_id,
-                "status": status,
-                "next_available_scan": next_scan,
-                "details": tracker_data.get(code, {})
-            })
-        else:
-            # Get the original tracking ID from tracker data
-            tracker_info = tracker_data.get(code, {})
-            original_tracking_id = tracker_info.get('shipment_tracker', code)
-            
-            trackers.append({
-                "tracker_code": code,
-                "original_tracking_id": original_tracking_id,
-                "status": {"label": False, "packing": False, "dispatch": False},
-                "next_available_scan": "label",
-                "details": tracker_data.get(code, {})
-            })
-    
-    return {"trackers": trackers}
+    return StreamingResponse(stream_all_trackers(), media_type="application/json")
 
 # Dashboard and statistics endpoints
-@app.get("/api/v1/dashboard/stats")
-async def get_dashboard_stats():
-    """Get dashboard statistics"""
+def cached_stats_response(key, build_stats) -> Response:
+    """Serve a stats body from cache, rebuilding it only after the data changed"""
+    cached = stats_cache.get(key)
+    if cached is None or cached[0] != stats_rev:
+        cached = (stats_rev, orjson.dumps(build_stats()))
+        stats_cache[key] = cached
+    return Response(content=cached[1], media_type="application/json")
+
+def build_dashboard_stats():
+    """Compute the dashboard statistics payload"""
     total_uploaded = len(uploaded_trackers)
     
     if total_uploaded == 0:
@@ -726,8 +1148,8 @@ async def get_dashboard_stats():
             "completion_rate": 0
         }
     
-    completed = sum(1 for code in uploaded_trackers if code in tracker_status and tracker_status[code].get("dispatch", False))
-    in_progress = sum(1 for code in uploaded_trackers if code in tracker_status and (tracker_status[code].get("label", False) or tracker_status[code].get("packing", False)) and not tracker_status[code].get("dispatch", False))
+    completed = count_trackers_with(DISPATCH_BIT)
+    in_progress = status_counts[LABEL_BIT] + status_counts[PACKING_BIT] + status_counts[LABEL_BIT | PACKING_BIT]
     pending = total_uploaded - completed - in_progress
     
     return {
@@ -738,9 +1160,13 @@ async def get_dashboard_stats():
         "completion_rate": round((completed / total_uploaded) * 100, 1)
     }
 
-@app.get("/api/v1/tracking/stats")
-async def get_tracking_statistics():
-    """Get comprehensive tracking statistics"""
+@app.get("/api/v1/dashboard/stats")
+async def get_dashboard_stats():
+    """Get dashboard statistics"""
+    return cached_stats_response("dashboard", build_dashboard_stats)
+
+def build_tracking_stats():
+    """Compute the comprehensive tracking statistics payload"""
     total_uploaded = len(uploaded_trackers)
     
     if total_uploaded == 0:
@@ -756,10 +1182,11 @@ async def get_tracking_statistics():
             "completion_percentage": 0
         }
     
-    label_scanned = sum(1 for code in uploaded_trackers if code in tracker_status and tracker_status[code].get("label", False))
-    packing_scanned = sum(1 for code in uploaded_trackers if code in tracker_status and tracker_status[code].get("packing", False))
-    dispatch_scanned = sum(1 for code in uploaded_trackers if code in tracker_status and tracker_status[code].get("dispatch", False))
-    completed = sum(1 for code in uploaded_trackers if code in tracker_status and tracker_status[code].get("dispatch", False))
+    # Read the incrementally maintained counters; a tracker is completed once dispatched
+    label_scanned = count_trackers_with(LABEL_BIT)
+    packing_scanned = count_trackers_with(PACKING_BIT)
+    dispatch_scanned = count_trackers_with(DISPATCH_BIT)
+    completed = dispatch_scanned
     
     return {
         "total_uploaded": total_uploaded,
@@ -773,57 +1200,68 @@ async def get_tracking_statistics():
         "completion_percentage": round((completed / total_uploaded) * 100, 1)
     }
 
+@app.get("/api/v1/tracking/stats")
+async def get_tracking_statistics():
+    """Get comprehensive tracking statistics"""
+    return cached_stats_response("tracking", build_tracking_stats)
+
+@lru_cache(maxsize=RECENT_SCANS_LIMIT)
+def format_scan_time(timestamp: str) -> str:
+    """Format an ISO scan timestamp for display, memoized per timestamp"""
+    try:
+        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        return dt.strftime("%Y-%m-%d %H:%M:%S")
+    except (AttributeError, ValueError):
+        return timestamp
+
+def parse_fields(fields: Optional[str]) -> Optional[frozenset]:
+    """Parse a comma-separated ?fields= value; None (or empty) selects every field"""
+    if not fields:
+        return None
+    return frozenset(field.strip() for field in fields.split(',') if field.strip()) or None
+
+def build_recent_scan_row(scan: ScanRecord, last_scan: str = None, fields: Optional[frozenset] = None) -> dict:
+    """Build a recent-scans row (optionally only the selected fields) from a scan record"""
+    tracker_code = scan.tracker_code
+    template = recent_row_templates.get(tracker_code)
+    if template is None:
+        template = make_recent_row_template(tracker_code, {})
+    if fields is None:
+        row = template.copy()
+    else:
+        row = {key: value for key, value in template.items() if key in fields}
+    
+    # Only compute the per-scan fields that made it into the row
+    if "id" in row:
+        row["id"] = scan.id
+    if "last_scan" in row:
+        row["last_scan"] = last_scan or scan.scan_type.capitalize()
+    if "scan_status" in row:
+        row["scan_status"] = "Success" if scan.status == 'completed' else "Error"
+    if "scan_time" in row:
+        scan_time = scan.timestamp
+        row["scan_time"] = format_scan_time(scan_time) if scan_time else scan_time
+    return row
+
 # Recent scans endpoints
 @app.get("/api/v1/scan/recent")
-async def get_recent_scans(page: int = 1, limit: int = 20):
+async def get_recent_scans(page: int = 1, limit: int = 20, fields: Optional[str] = None):
     """Get recent scans with pagination"""
     try:
         # Calculate offset
         offset = (page - 1) * limit
         
         # Get recent scans with tracker details
-        recent_scans = []
-        for scan in scans_db[offset:offset + limit]:
-            tracker_code = scan.get('tracker_code', '')
-            tracker_info = tracker_data.get(tracker_code, {})
-            
-            # Determine last scan type
-            last_scan = scan.get('scan_type', 'label').capitalize()
-            
-            # Determine scan status
-            scan_status = "Success" if scan.get('status', '') == 'completed' else "Error"
-            
-            # Determine distribution type (simplified - assume single SKU for now)
-            distribution = "Single SKU"
-            
-            # Format scan time
-            scan_time = scan.get('timestamp', '')
-            if scan_time:
-                try:
-                    dt = datetime.fromisoformat(scan_time.replace('Z', '+00:00'))
-                    scan_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    scan_time = scan_time
-            
-            recent_scans.append({
-                "id": str(scan.get('id', '')),
-                "tracking_id": tracker_info.get('shipment_tracker', tracker_code),
-                "platform": tracker_info.get('channel_name', 'Unknown'),
-                "last_scan": last_scan,
-                "scan_status": scan_status,
-                "distribution": distribution,
-                "scan_time": scan_time,
-                "amount": tracker_info.get('amount', 0),
-                "buyer_city": tracker_info.get('buyer_city', 'Unknown'),
-                "courier": tracker_info.get('courier', 'Unknown')
-            })
+        selected = parse_fields(fields)
+        recent_scans = [build_recent_scan_row(scan, None, selected) for scan in islice(scans_db, offset, offset + limit)]
         
+        count = len(scans_db)
         return {
             "results": recent_scans,
-            "count": len(scans_db),
+            "count": count,
             "page": page,
             "limit": limit,
-            "total_pages": (len(scans_db) + limit - 1) // limit
+            "total_pages": -(-count // limit)
         }
         
     except Exception as e:
@@ -831,250 +1269,130 @@ async def get_recent_scans(page: int = 1, limit: int = 20):
 
 # Add missing endpoints that frontend uses
 
+def build_platform_stats(scan_mask: int):
+    """Compute per-courier statistics for trackers scanned at any checkpoint in scan_mask"""
+    # Group trackers by courier, in order of first appearance
+    courier_stats = {
+        courier: {
+            "courier": courier,
+            "total": 0,
+            "scanned": 0,
+            "pending": 0,
+            "multi_sku_scanned": 0,
+            "single_sku_scanned": 0,
+            "multi_sku_pending": 0,
+            "single_sku_pending": 0
+        }
+        for courier in couriers_by_first_upload()
+    }
+    
+    # Fold the maintained (courier, Multi-SKU, scan flags) group counts into the stats
+    for (courier, is_multi_sku, bits), count in platform_groups.items():
+        courier_stats[courier]["total"] += count
+        
+        if bits & scan_mask:
+            courier_stats[courier]["scanned"] += count
+            if is_multi_sku:
+                courier_stats[courier]["multi_sku_scanned"] += count
+            else:
+                courier_stats[courier]["single_sku_scanned"] += count
+        else:
+            courier_stats[courier]["pending"] += count
+            if is_multi_sku:
+                courier_stats[courier]["multi_sku_pending"] += count
+            else:
+                courier_stats[courier]["single_sku_pending"] += count
+    
+    # Convert to list (skipping couriers whose entries all moved away) and sort by total count
+    result = [stats for stats in courier_stats.values() if stats["total"]]
+    result.sort(key=lambda x: x["total"], reverse=True)
+    
+    return result
+
 @app.get("/api/v1/scan/statistics/platform")
 async def get_platform_statistics(scan_type: str = None):
     """Get platform/courier statistics with scan counts including Multi-SKU and Single-SKU breakdown"""
     try:
-        # Group trackers by courier and calculate statistics
-        courier_stats = {}
-        
-        # Group trackers by tracking ID to identify Multi-SKU orders
-        tracking_id_groups = {}
-        for tracker_code in uploaded_trackers:
-            tracker_info = tracker_data.get(tracker_code, {})
-            tracking_id = tracker_info.get('shipment_tracker', '')
-            if tracking_id:
-                if tracking_id not in tracking_id_groups:
-                    tracking_id_groups[tracking_id] = []
-                tracking_id_groups[tracking_id].append(tracker_code)
-        
-        for tracker_code in uploaded_trackers:
-            tracker_info = tracker_data.get(tracker_code, {})
-            courier = tracker_info.get('courier', 'Unknown')
-            tracking_id = tracker_info.get('shipment_tracker', '')
-            
-            if courier not in courier_stats:
-                courier_stats[courier] = {
-                    "courier": courier,
-                    "total": 0,
-                    "scanned": 0,
-                    "pending": 0,
-                    "multi_sku_scanned": 0,
-                    "single_sku_scanned": 0,
-                    "multi_sku_pending": 0,
-                    "single_sku_pending": 0
-                }
-            
-            courier_stats[courier]["total"] += 1
-            
-            # Check if tracker has been scanned based on scan_type parameter
-            tracker_status_info = tracker_status.get(tracker_code, {})
-            
-            if scan_type:
-                # Filter by specific scan type
-                if scan_type == "label":
-                    has_scans = tracker_status_info.get("label", False)
-                elif scan_type == "packing":
-                    has_scans = tracker_status_info.get("packing", False)
-                elif scan_type == "dispatch":
-                    has_scans = tracker_status_info.get("dispatch", False)
-                else:
-                    has_scans = any(tracker_status_info.values())
-            else:
-                # Default behavior - check if tracker has been scanned at any checkpoint
-                has_scans = any(tracker_status_info.values())
-            
-            # Determine if this is part of a Multi-SKU order
-            is_multi_sku = len(tracking_id_groups.get(tracking_id, [])) > 1
-            
-            if has_scans:
-                courier_stats[courier]["scanned"] += 1
-                if is_multi_sku:
-                    courier_stats[courier]["multi_sku_scanned"] += 1
-                else:
-                    courier_stats[courier]["single_sku_scanned"] += 1
-            else:
-                courier_stats[courier]["pending"] += 1
-                if is_multi_sku:
-                    courier_stats[courier]["multi_sku_pending"] += 1
-                else:
-                    courier_stats[courier]["single_sku_pending"] += 1
-        
-        # Convert to list and sort by total count
-        result = list(courier_stats.values())
-        result.sort(key=lambda x: x["total"], reverse=True)
-        
-        return result
+        # Check the scan_type bit, or by default whether any checkpoint was scanned
+        scan_mask = SCAN_TYPE_BITS.get(scan_type, LABEL_BIT | PACKING_BIT | DISPATCH_BIT)
+        return cached_stats_response(("platform", scan_mask), lambda: build_platform_stats(scan_mask))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching platform statistics: {str(e)}")
 
 @app.get("/api/v1/scan/recent/label")
-async def get_recent_label_scans(page: int = 1, limit: int = 20):
+async def get_recent_label_scans(page: int = 1, limit: int = 20, fields: Optional[str] = None):
     """Get recent label scans with pagination"""
     try:
-        # Filter scans for label type only
-        label_scans = [scan for scan in scans_db if scan.get('scan_type') == 'label']
+        # Scans are partitioned by type as they are recorded
+        label_scans = recent_scans_by_type["label"]
         
         # Calculate offset
         offset = (page - 1) * limit
         
         # Get recent label scans with tracker details
-        recent_scans = []
-        for scan in label_scans[offset:offset + limit]:
-            tracker_code = scan.get('tracker_code', '')
-            tracker_info = tracker_data.get(tracker_code, {})
-            
-            # Determine scan status
-            scan_status = "Success" if scan.get('status', '') == 'completed' else "Error"
-            
-            # Determine distribution type
-            tracking_id = tracker_info.get('shipment_tracker', '')
-            trackers_with_same_id = [t for t in uploaded_trackers if tracker_data.get(t, {}).get('shipment_tracker') == tracking_id]
-            distribution = "Multi SKU" if len(trackers_with_same_id) > 1 else "Single SKU"
-            
-            # Format scan time
-            scan_time = scan.get('timestamp', '')
-            if scan_time:
-                try:
-                    dt = datetime.fromisoformat(scan_time.replace('Z', '+00:00'))
-                    scan_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    scan_time = scan_time
-            
-            recent_scans.append({
-                "id": str(scan.get('id', '')),
-                "tracking_id": tracker_info.get('shipment_tracker', tracker_code),
-                "platform": tracker_info.get('channel_name', 'Unknown'),
-                "last_scan": "Label",
-                "scan_status": scan_status,
-                "distribution": distribution,
-                "scan_time": scan_time,
-                "amount": tracker_info.get('amount', 0),
-                "buyer_city": tracker_info.get('buyer_city', 'Unknown'),
-                "courier": tracker_info.get('courier', 'Unknown')
-            })
+        selected = parse_fields(fields)
+        recent_scans = [build_recent_scan_row(scan, "Label", selected) for scan in islice(label_scans, offset, offset + limit)]
         
+        count = len(label_scans)
         return {
             "results": recent_scans,
-            "count": len(label_scans),
+            "count": count,
             "page": page,
             "limit": limit,
-            "total_pages": (len(label_scans) + limit - 1) // limit
+            "total_pages": -(-count // limit)
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching recent label scans: {str(e)}")
 
 @app.get("/api/v1/scan/recent/packing")
-async def get_recent_packing_scans(page: int = 1, limit: int = 20):
+async def get_recent_packing_scans(page: int = 1, limit: int = 20, fields: Optional[str] = None):
     """Get recent packing scans with pagination"""
     try:
-        # Filter scans for packing type only
-        packing_scans = [scan for scan in scans_db if scan.get('scan_type') in ['packing', 'packing_dual']]
+        # Scans are partitioned by type as they are recorded
+        packing_scans = recent_scans_by_type["packing"]
         
         # Calculate offset
         offset = (page - 1) * limit
         
         # Get recent packing scans with tracker details
-        recent_scans = []
-        for scan in packing_scans[offset:offset + limit]:
-            tracker_code = scan.get('tracker_code', '')
-            tracker_info = tracker_data.get(tracker_code, {})
-            
-            # Determine scan status
-            scan_status = "Success" if scan.get('status', '') == 'completed' else "Error"
-            
-            # Determine distribution type
-            tracking_id = tracker_info.get('shipment_tracker', '')
-            trackers_with_same_id = [t for t in uploaded_trackers if tracker_data.get(t, {}).get('shipment_tracker') == tracking_id]
-            distribution = "Multi SKU" if len(trackers_with_same_id) > 1 else "Single SKU"
-            
-            # Format scan time
-            scan_time = scan.get('timestamp', '')
-            if scan_time:
-                try:
-                    dt = datetime.fromisoformat(scan_time.replace('Z', '+00:00'))
-                    scan_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    scan_time = scan_time
-            
-            recent_scans.append({
-                "id": str(scan.get('id', '')),
-                "tracking_id": tracker_info.get('shipment_tracker', tracker_code),
-                "platform": tracker_info.get('channel_name', 'Unknown'),
-                "last_scan": "Packing",
-                "scan_status": scan_status,
-                "distribution": distribution,
-                "scan_time": scan_time,
-                "amount": tracker_info.get('amount', 0),
-                "buyer_city": tracker_info.get('buyer_city', 'Unknown'),
-                "courier": tracker_info.get('courier', 'Unknown')
-            })
+        selected = parse_fields(fields)
+        recent_scans = [build_recent_scan_row(scan, "Packing", selected) for scan in islice(packing_scans, offset, offset + limit)]
         
+        count = len(packing_scans)
         return {
             "results": recent_scans,
-            "count": len(packing_scans),
+            "count": count,
             "page": page,
             "limit": limit,
-            "total_pages": (len(packing_scans) + limit - 1) // limit
+            "total_pages": -(-count // limit)
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching recent packing scans: {str(e)}")
 
 @app.get("/api/v1/scan/recent/dispatch")
-async def get_recent_dispatch_scans(page: int = 1, limit: int = 20):
+async def get_recent_dispatch_scans(page: int = 1, limit: int = 20, fields: Optional[str] = None):
     """Get recent dispatch scans with pagination"""
     try:
-        # Filter scans for dispatch type only
-        dispatch_scans = [scan for scan in scans_db if scan.get('scan_type') == 'dispatch']
+        # Scans are partitioned by type as they are recorded
+        dispatch_scans = recent_scans_by_type["dispatch"]
         
         # Calculate offset
         offset = (page - 1) * limit
         
         # Get recent dispatch scans with tracker details
-        recent_scans = []
-        for scan in dispatch_scans[offset:offset + limit]:
-            tracker_code = scan.get('tracker_code', '')
-            tracker_info = tracker_data.get(tracker_code, {})
-            
-            # Determine scan status
-            scan_status = "Success" if scan.get('status', '') == 'completed' else "Error"
-            
-            # Determine distribution type
-            tracking_id = tracker_info.get('shipment_tracker', '')
-            trackers_with_same_id = [t for t in uploaded_trackers if tracker_data.get(t, {}).get('shipment_tracker') == tracking_id]
-            distribution = "Multi SKU" if len(trackers_with_same_id) > 1 else "Single SKU"
-            
-            # Format scan time
-            scan_time = scan.get('timestamp', '')
-            if scan_time:
-                try:
-                    dt = datetime.fromisoformat(scan_time.replace('Z', '+00:00'))
-                    scan_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    scan_time = scan_time
-            
-            recent_scans.append({
-                "id": str(scan.get('id', '')),
-                "tracking_id": tracker_info.get('shipment_tracker', tracker_code),
-                "platform": tracker_info.get('channel_name', 'Unknown'),
-                "last_scan": "Dispatch",
-                "scan_status": scan_status,
-                "distribution": distribution,
-                "scan_time": scan_time,
-                "amount": tracker_info.get('amount', 0),
-                "buyer_city": tracker_info.get('buyer_city', 'Unknown'),
-                "courier": tracker_info.get('courier', 'Unknown')
-            })
+        selected = parse_fields(fields)
+        recent_scans = [build_recent_scan_row(scan, "Dispatch", selected) for scan in islice(dispatch_scans, offset, offset + limit)]
         
+        count = len(dispatch_scans)
         return {
             "results": recent_scans,
-            "count": len(dispatch_scans),
+            "count": count,
             "page": page,
             "limit": limit,
-            "total_pages": (len(dispatch_scans) + limit - 1) // limit
+            "total_pages": -(-count // limit)
         }
         
     except Exception as e:
@@ -1084,14 +1402,19 @@ async def get_recent_dispatch_scans(page: int = 1, limit: int = 20):
 @app.post("/api/v1/system/clear-data/")
 async def clear_all_data():
     """Clear all data"""
-    global scans_db, tracker_status, uploaded_trackers, tracker_data
+    global scans_db, tracker_status, uploaded_trackers, tracker_data, tracker_scan_count, tracker_scan_progress, scan_seq
     
-    scans_db = []
+    scans_db = deque(maxlen=RECENT_SCANS_LIMIT)
+    scan_seq = 0
     tracker_status = {}
     uploaded_trackers = []
     tracker_data = {}
+    tracker_scan_count = {}
+    tracker_scan_progress = {}
+    rebuild_indexes()
     
-    save_data()
+    # The next snapshot starts past the existing log, which stays as history
+    mark_dirty()
     
     return {"message": "All data cleared successfully"}
 
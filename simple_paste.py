@@ -1,250 +1,312 @@
 #!/usr/bin/env python3
 """
 Simple paste script - gets exact data from frontend API and pastes without modifications
+
+Usage: simple_paste.py [preview|paste|debug] [--verify] [-q]  (no action: interactive menu)
 """
 
+import argparse
+import logging
 import os
 import sys
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 
 # Add the app directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.services.firestore_service import firestore_service
-from app.services.gsheets_service import gsheets_service
+from app.services.gsheets_service import (
+    DETAIL_DEFAULTS, HEADER_RANGE, HEADERS, LAST_COLUMN, TRACKER_SHEET_FIELDS,
+    disable_text_wrapping, get_detail_fields, gsheets_service, stage_status_from_flags
+)
 
-def get_stage_and_status_from_flags(status):
-    """Calculate stage and status from boolean flags using exact frontend logic"""
-    # Get scan status information
-    label_scanned = status.get('label', False)
-    packing_scanned = status.get('packing', False)
-    dispatch_scanned = status.get('dispatch', False)
-    cancelled = status.get('cancelled', False)
-    pending = status.get('pending', False)
-    
-    # Determine Stage (EXACTLY matching frontend getCurrentStage logic)
-    if cancelled:
-        stage = 'Dispatch Cancelled'
-    elif dispatch_scanned:
-        stage = 'Dispatch'
-    # Dispatch Pending: label = true, packing = true, pending = true
-    elif label_scanned and packing_scanned and pending:
-        stage = 'Dispatch Pending'
-    elif packing_scanned:
-        stage = 'Packing'
-    # Packing Hold: label = true, pending = true (but packing = false)
-    elif label_scanned and pending:
-        stage = 'Packing Hold'
-    elif label_scanned:
-        stage = 'Packing Pending'
-    else:
-        stage = 'Label'
+logger = logging.getLogger(__name__)
+
+def configure_logging(level=logging.INFO):
+    """Show progress messages on the console for the command line and menu, unless logging is already configured"""
+    # basicConfig does nothing once the root logger has handlers
+    logging.basicConfig(level=level, format="%(message)s")
+
+# Consecutive actions within this many seconds reuse the same Firestore snapshot
+FRONTEND_DATA_TTL_SECONDS = 60
+# (fetched_at, trackers) from the last successful get_frontend_data call
+_frontend_data_cache = None
+
+# Bits of the status flag key indexing STAGE_STATUS_TABLE
+CANCELLED_FLAG = 16
+DISPATCH_FLAG = 8
+PACKING_FLAG = 4
+LABEL_FLAG = 2
+PENDING_FLAG = 1
+
+# (stage, status) for all 32 combinations of the status flags, indexed by flag key
+STAGE_STATUS_TABLE = tuple(
+    stage_status_from_flags(
+        label_scanned=bool(key & LABEL_FLAG),
+        packing_scanned=bool(key & PACKING_FLAG),
+        dispatch_scanned=bool(key & DISPATCH_FLAG),
+        pending=bool(key & PENDING_FLAG),
+        cancelled=bool(key & CANCELLED_FLAG)
+    )
+    for key in range(32)
+)
+
+def status_flag_key(status):
+    """Pack a tracker's status flags into a STAGE_STATUS_TABLE index"""
+    return (
+        (CANCELLED_FLAG if status.get('cancelled', False) else 0)
+        | (DISPATCH_FLAG if status.get('dispatch', False) else 0)
+        | (PACKING_FLAG if status.get('packing', False) else 0)
+        | (LABEL_FLAG if status.get('label', False) else 0)
+        | (PENDING_FLAG if status.get('pending', False) else 0)
+    )
+
+# Rows per values_batch_update request when pasting
+PASTE_CHUNK_ROWS = 5000
+
+def fetch_tracker_snapshot():
+    """Fetch all tracker status and tracker data from Firestore concurrently"""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        status_future = executor.submit(firestore_service.get_all_tracker_status)
+        data_future = executor.submit(firestore_service.get_all_tracker_data, TRACKER_SHEET_FIELDS)
+        return status_future.result(), data_future.result()
+
+def invalidate_frontend_cache():
+    """Drop the cached frontend data so the next read goes to Firestore"""
+    global _frontend_data_cache
+    _frontend_data_cache = None
+
+def get_cached_frontend_data():
+    """Get the cached frontend data if it is still fresh, else None"""
+    if _frontend_data_cache and time.monotonic() - _frontend_data_cache[0] < FRONTEND_DATA_TTL_SECONDS:
+        logger.info("📊 Reusing frontend data fetched %.0fs ago", time.monotonic() - _frontend_data_cache[0])
+        return _frontend_data_cache[1]
+    return None
+
+def make_frontend_tracker(doc_id, tracker_data, status):
+    """Build a tracker entry the way the backend API does, with its status flags packed into flag_key"""
+    # Get the original tracking ID from tracker data
+    original_tracking_id = tracker_data.get('shipment_tracker', doc_id)
     
-    # Determine Status (EXACTLY matching frontend getCurrentStatusWithPackingPending logic)
-    if cancelled:
-        current_status = 'Cancelled'
-    elif dispatch_scanned:
-        current_status = 'Dispatched'
-    # Dispatch Pending: label = true, packing = true, pending = true
-    elif label_scanned and packing_scanned and pending:
-        current_status = 'Dispatch Pending'
-    elif packing_scanned:
-        current_status = 'Packing Scanned'
-    # Packing Hold: label = true, pending = true (but packing = false)
-    elif label_scanned and pending:
-        current_status = 'Packing Hold'
-    elif label_scanned:
-        current_status = 'Packing Pending Shipment'
-    else:
-        current_status = 'Label yet to Scan'
+    if status is None:
+        return {
+            "tracker_code": doc_id,
+            "original_tracking_id": original_tracking_id,
+            "status": {"label": False, "packing": False, "dispatch": False, "pending": False},
+            "next_available_scan": "label",
+            "details": tracker_data,
+            "flag_key": 0
+        }
     
-    return stage, current_status
+    next_scan = "label" if not status.get("label", False) else \
+               "packing" if not status.get("packing", False) else \
+               "dispatch" if not status.get("dispatch", False) else "completed"
+    return {
+        "tracker_code": doc_id,
+        "original_tracking_id": original_tracking_id,
+        "status": status,
+        "next_available_scan": next_scan,
+        "details": tracker_data,
+        "flag_key": status_flag_key(status)
+    }
 
-def get_frontend_data():
+def get_frontend_data(use_cache=True):
     """Get the exact data that the frontend shows - no modifications"""
-    print("📊 Getting frontend data...")
-    print("=" * 50)
+    global _frontend_data_cache
+    
+    if use_cache:
+        cached = get_cached_frontend_data()
+        if cached is not None:
+            return cached
+    
+    logger.info("📊 Getting frontend data...")
+    logger.info("=" * 50)
     
     try:
-        # Get the exact same data that the frontend uses
-        all_status = firestore_service.get_all_tracker_status()
-        all_data = firestore_service.get_all_tracker_data()
+        # Get the exact same data that the frontend uses (both reads in flight at once)
+        all_status, all_data = fetch_tracker_snapshot()
         
-        trackers = []
         # Use the same logic as the backend API
-        for doc_id, tracker_data in all_data.items():
-            if doc_id in all_status:
-                status = all_status[doc_id]
-                next_scan = "label" if not status.get("label", False) else \
-                           "packing" if not status.get("packing", False) else \
-                           "dispatch" if not status.get("dispatch", False) else "completed"
-                
-                # Get the original tracking ID from tracker data
-                original_tracking_id = tracker_data.get('shipment_tracker', doc_id)
-                
-                trackers.append({
-                    "tracker_code": doc_id,
-                    "original_tracking_id": original_tracking_id,
-                    "status": status,
-                    "next_available_scan": next_scan,
-                    "details": tracker_data
-                })
-            else:
-                # Get the original tracking ID from tracker data
-                original_tracking_id = tracker_data.get('shipment_tracker', doc_id)
-                
-                trackers.append({
-                    "tracker_code": doc_id,
-                    "original_tracking_id": original_tracking_id,
-                    "status": {"label": False, "packing": False, "dispatch": False, "pending": False},
-                    "next_available_scan": "label",
-                    "details": tracker_data
-                })
+        trackers = [
+            make_frontend_tracker(doc_id, tracker_data, all_status.get(doc_id))
+            for doc_id, tracker_data in all_data.items()
+        ]
         
-        print(f"📊 Found {len(trackers)} trackers (exact frontend data)")
+        logger.info("📊 Found %d trackers (exact frontend data)", len(trackers))
+        _frontend_data_cache = (time.monotonic(), trackers)
         return trackers
         
     except Exception as e:
-        print(f"❌ Error getting frontend data: {e}")
+        logger.error("❌ Error getting frontend data: %s", e)
         return []
 
-def simple_paste_to_sheets():
+def get_frontend_sample(n):
+    """Get the first n trackers as the frontend shows them plus the total count, without a full read"""
+    cached = get_cached_frontend_data()
+    if cached is not None:
+        return cached[:n], len(cached)
+    
+    all_data = firestore_service.get_first_n_trackers(n, TRACKER_SHEET_FIELDS)
+    all_status = firestore_service.get_tracker_status_batch(list(all_data))
+    trackers = [
+        make_frontend_tracker(doc_id, tracker_data, all_status.get(doc_id))
+        for doc_id, tracker_data in all_data.items()
+    ]
+    return trackers, firestore_service.count_tracker_data()
+
+def get_frontend_trackers(tracker_codes):
+    """Get specific trackers as the frontend shows them, reading only their documents"""
+    cached = get_cached_frontend_data()
+    if cached is not None:
+        wanted = set(tracker_codes)
+        return [tracker for tracker in cached if tracker['tracker_code'] in wanted]
+    
+    all_data = firestore_service.get_tracker_data_batch(tracker_codes)
+    all_status = firestore_service.get_tracker_status_batch(list(all_data))
+    return [
+        make_frontend_tracker(doc_id, all_data[doc_id], all_status.get(doc_id))
+        for doc_id in sorted(all_data)
+    ]
+
+def iter_paste_rows(trackers):
+    """Yield the sheet row for each tracker - NO MODIFICATIONS"""
+    for tracker in trackers:
+        # Get details from the tracker
+        details = tracker['details']
+        
+        # Look up stage and status from the pre-packed boolean flags (exact frontend logic)
+        stage, current_status = STAGE_STATUS_TABLE[tracker['flag_key']]
+        
+        # Pull every detail field in one call, defaulting the missing ones
+        (order_id, channel_name, courier, buyer_city, buyer_state, buyer_pincode, amount,
+         qty, payment_mode, order_status, g_code, ean_code, product_sku_code,
+         channel_listing_id, invoice_number, sub_order_id, last_updated) = get_detail_fields({**DETAIL_DEFAULTS, **details})
+        
+        # Use the calculated stage and status
+        yield [
+            str(tracker['tracker_code']),  # Tracker Code
+            str(tracker['original_tracking_id']),  # Tracking ID
+            str(order_id),  # Order ID
+            stage,  # Stage (calculated from flags)
+            current_status,  # Status (calculated from flags)
+            str(channel_name),  # Channel
+            str(courier),  # Courier
+            str(buyer_city),  # City
+            str(buyer_state),  # State
+            str(buyer_pincode),  # Pincode
+            f"₹{amount}" if amount else "₹0",  # Amount (with ₹ symbol)
+            str(qty),  # Qty
+            str(payment_mode),  # Payment
+            str(order_status),  # Order Status
+            str(g_code),  # G-Code
+            str(ean_code),  # EAN-Code
+            str(product_sku_code),  # Product SKU
+            str(channel_listing_id),  # Listing ID
+            str(invoice_number),  # Invoice
+            str(sub_order_id),  # Sub Order ID
+            last_updated or "-"  # Last Updated
+        ]
+
+def simple_paste_to_sheets(verify=False):
     """Simple paste - no modifications, just paste what frontend shows"""
-    print("🔄 Simple Paste to Google Sheets (No Modifications)")
-    print("=" * 50)
+    logger.info("🔄 Simple Paste to Google Sheets (No Modifications)")
+    logger.info("=" * 50)
     
     try:
-        # Initialize services
-        print("🔧 Initializing services...")
-        gsheets_service.initialize()
+        # Initialize services once; later pastes reuse the authorized client and its
+        # pooled keep-alive connections instead of re-authorizing
+        if not gsheets_service.initialized:
+            logger.info("🔧 Initializing services...")
+            gsheets_service.initialize()
         
         # Get frontend data
         trackers = get_frontend_data()
         
         if not trackers:
-            print("❌ No tracker data found")
+            logger.error("❌ No tracker data found")
             return False
         
-        print(f"📊 Found {len(trackers)} trackers to paste")
+        logger.info("📊 Found %d trackers to paste", len(trackers))
         
         # Open spreadsheet and worksheet
         spreadsheet = gsheets_service.sheets_service.open_by_key(gsheets_service.spreadsheet_id)
         worksheet = spreadsheet.worksheet(gsheets_service.worksheet_name)
         
-        print(f"📊 Opened spreadsheet: {spreadsheet.title}")
-        print(f"📋 Using worksheet: {gsheets_service.worksheet_name}")
+        logger.info("📊 Opened spreadsheet: %s", spreadsheet.title)
+        logger.info("📋 Using worksheet: %s", gsheets_service.worksheet_name)
         
-        # Clear all existing data
-        print("🧹 Clearing existing data...")
-        worksheet.clear()
+        # One row per tracker
+        logger.info("📋 Pasting %d data rows...", len(trackers))
+        end_row = len(trackers) + 1  # +1 for headers
+        paste_range = f"A2:{LAST_COLUMN}{end_row}"
         
-        # Prepare headers
-        headers = [
-            'Tracker Code', 'Tracking ID', 'Order ID', 'Stage', 'Status',
-            'Channel', 'Courier', 'City', 'State', 'Pincode', 'Amount', 'Qty', 'Payment', 'Order Status',
-            'G-Code', 'EAN-Code', 'Product SKU', 'Listing ID', 'Invoice', 'Sub Order ID', 'Last Updated'
-        ]
+        # Clear the pasted columns
+        logger.info("🧹 Clearing existing data...")
+        spreadsheet.batch_update({
+            "requests": [
+                {
+                    "updateCells": {
+                        "range": {"sheetId": worksheet.id, "startColumnIndex": 0, "endColumnIndex": len(HEADERS)},
+                        "fields": "userEnteredValue"
+                    }
+                }
+            ]
+        })
         
-        # Add headers first
-        print("📋 Adding headers...")
-        worksheet.update('A1:U1', [headers])
+        # Build and paste rows in chunks so only one chunk is held in memory
+        # and no single request approaches the Sheets request size limit
+        logger.info("📝 Preparing data rows (no modifications)...")
+        sheet_name = worksheet.title.replace("'", "''")
+        data = [{"range": f"'{sheet_name}'!{HEADER_RANGE}", "values": [HEADERS]}]
+        rows = iter_paste_rows(trackers)
+        start_row = 2
+        updated_rows = 0
+        while True:
+            chunk = list(islice(rows, PASTE_CHUNK_ROWS))
+            if not chunk:
+                break
+            chunk_end_row = start_row + len(chunk) - 1
+            data.append({"range": f"'{sheet_name}'!A{start_row}:{LAST_COLUMN}{chunk_end_row}", "values": chunk})
+            response = spreadsheet.values_batch_update({"valueInputOption": "RAW", "data": data})
+            updated_rows += response.get('totalUpdatedRows', 0)
+            logger.info("📋 Pasted rows %d-%d", start_row, chunk_end_row)
+            start_row = chunk_end_row + 1
+            data = []
         
-        # Prepare all data rows - NO MODIFICATIONS
-        print("📝 Preparing data rows (no modifications)...")
-        all_rows = []
+        logger.info("✅ Successfully pasted %d rows", len(trackers))
         
-        for tracker in trackers:
-            # Get details from the tracker
-            details = tracker['details']
-            status = tracker['status']
-            
-            # Calculate stage and status from boolean flags (exact frontend logic)
-            stage, current_status = get_stage_and_status_from_flags(status)
-            
-            # Format amount with ₹ symbol
-            amount = details.get('amount', 0)
-            formatted_amount = f"₹{amount}" if amount else "₹0"
-            
-            # Format last updated timestamp
-            last_updated = details.get('last_updated', '')
-            formatted_last_updated = "-" if not last_updated else last_updated
-            
-            # Use the calculated stage and status
-            row_data = [
-                str(tracker['tracker_code']),  # Tracker Code
-                str(tracker['original_tracking_id']),  # Tracking ID
-                str(details.get('order_id', '')),  # Order ID
-                stage,  # Stage (calculated from flags)
-                current_status,  # Status (calculated from flags)
-                str(details.get('channel_name', '')),  # Channel
-                str(details.get('courier', '')),  # Courier
-                str(details.get('buyer_city', '')),  # City
-                str(details.get('buyer_state', '')),  # State
-                str(details.get('buyer_pincode', '')),  # Pincode
-                formatted_amount,  # Amount (with ₹ symbol)
-                str(details.get('qty', '')),  # Qty
-                str(details.get('payment_mode', '')),  # Payment
-                str(details.get('order_status', '')),  # Order Status
-                str(details.get('g_code', '')),  # G-Code
-                str(details.get('ean_code', '')),  # EAN-Code
-                str(details.get('product_sku_code', '')),  # Product SKU
-                str(details.get('channel_listing_id', '')),  # Listing ID
-                str(details.get('invoice_number', '')),  # Invoice
-                str(details.get('sub_order_id', '')),  # Sub Order ID
-                formatted_last_updated  # Last Updated
-            ]
-            all_rows.append(row_data)
+        # Disable text wrapping (best effort)
+        disable_text_wrapping(spreadsheet, worksheet, end_row)
+        logger.info("📊 Data range: %s", paste_range)
+        # The write responses report what landed, so no re-download is needed
+        logger.info("✅ Sheets confirmed %d rows written (including headers)", updated_rows)
         
-        # Paste all data at once
-        if all_rows:
-            print(f"📋 Pasting {len(all_rows)} data rows...")
-            
-            # Calculate the range for all data
-            end_row = len(all_rows) + 1  # +1 for headers
-            paste_range = f"A2:U{end_row}"
-            
-            # Paste all data at once
-            worksheet.update(paste_range, all_rows)
-            
-            print(f"✅ Successfully pasted {len(all_rows)} rows")
-            print(f"📊 Data range: A2:U{end_row}")
-            
-            # Verify the paste
+        # Verifying downloads the whole sheet again, so only do it on request
+        if verify:
             all_values = worksheet.get_all_values()
-            print(f"✅ Verified: {len(all_values)} total rows in sheet")
-            print(f"📋 Headers: {len(all_values[0]) if all_values else 0} columns")
-            print(f"📊 Data: {len(all_values) - 1 if len(all_values) > 1 else 0} rows")
+            logger.info("✅ Verified: %d total rows in sheet", len(all_values))
+            logger.info("📋 Headers: %d columns", len(all_values[0]) if all_values else 0)
+            logger.info("📊 Data: %d rows", len(all_values) - 1 if len(all_values) > 1 else 0)
             
             # Show sample data
             if len(all_values) > 1:
-                print("\n📋 Sample data (first row):")
+                logger.info("📋 Sample data (first row):")
                 first_row = all_values[1]
                 for i, value in enumerate(first_row[:5], 1):
-                    print(f"   Column {i}: {value}")
-            
-            # Disable text wrapping
-            try:
-                worksheet.format(f'A1:U{end_row}', {
-                    "wrapStrategy": "CLIP"
-                })
-                print("📄 Disabled text wrapping")
-            except Exception as wrap_error:
-                print(f"⚠️ Could not disable text wrapping: {wrap_error}")
-            
-            print(f"\n🎉 Simple paste completed successfully!")
-            print(f"📅 Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"📊 Spreadsheet URL: https://docs.google.com/spreadsheets/d/{gsheets_service.spreadsheet_id}")
-            
-            return True
-        else:
-            print("❌ No data rows to paste")
-            return False
+                    logger.info("   Column %d: %s", i, value)
+        
+        logger.info("🎉 Simple paste completed successfully!")
+        logger.info("📅 Completed at: %s", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        logger.info("📊 Spreadsheet URL: https://docs.google.com/spreadsheets/d/%s", gsheets_service.spreadsheet_id)
+        
+        return True
             
     except Exception as e:
-        print(f"❌ Simple paste error: {e}")
-        import traceback
-        print(f"🔍 Full traceback: {traceback.format_exc()}")
+        logger.exception("❌ Simple paste error: %s", e)
         return False
 
 def show_frontend_data_preview():
@@ -253,33 +315,28 @@ def show_frontend_data_preview():
     print("=" * 50)
     
     try:
-        trackers = get_frontend_data()
+        # Only the sample is read, plus a server-side count for the total
+        trackers, total = get_frontend_sample(3)
         
         if not trackers:
             print("❌ No tracker data found")
             return
         
-        print(f"📊 Total trackers: {len(trackers)}")
+        print(f"📊 Total trackers: {total if total is not None else 'unknown'}")
         print("\n📋 Headers:")
-        headers = [
-            'Tracker Code', 'Tracking ID', 'Order ID', 'Stage', 'Status',
-            'Channel', 'Courier', 'City', 'State', 'Pincode', 'Amount', 'Qty', 'Payment', 'Order Status',
-            'G-Code', 'EAN-Code', 'Product SKU', 'Listing ID', 'Invoice', 'Sub Order ID', 'Last Updated'
-        ]
-        for i, header in enumerate(headers, 1):
+        for i, header in enumerate(HEADERS, 1):
             print(f"   {i:2d}. {header}")
         
         print("\n📊 Sample data (first 3 trackers):")
-        sample_count = min(3, len(trackers))
         
-        for i, tracker in enumerate(trackers[:sample_count], 1):
+        for i, tracker in enumerate(trackers, 1):
             details = tracker['details']
             status = tracker['status']
             amount = details.get('amount', 0)
             formatted_amount = f"₹{amount}" if amount else "₹0"
             
-            # Calculate stage and status from boolean flags
-            stage, current_status = get_stage_and_status_from_flags(status)
+            # Look up stage and status from the packed boolean flags
+            stage, current_status = STAGE_STATUS_TABLE[tracker['flag_key']]
             
             print(f"\n   {i}. {tracker['tracker_code']}")
             print(f"      Tracking ID: {tracker['original_tracking_id']}")
@@ -300,8 +357,6 @@ def debug_specific_trackers():
     print("=" * 50)
     
     try:
-        trackers = get_frontend_data()
-        
         # Trackers that should have different stages based on frontend
         target_trackers = [
             "AARO11G25037_1754113580122_1be5eaac",  # Should be Packing Pending
@@ -311,47 +366,89 @@ def debug_specific_trackers():
             "AARO11G25048_1754113581530_8229ff25",  # Should be Packing
         ]
         
-        for tracker in trackers:
-            if tracker['tracker_code'] in target_trackers:
-                details = tracker['details']
-                status = tracker['status']
-                stage, current_status = get_stage_and_status_from_flags(status)
-                
-                print(f"\n📊 Tracker: {tracker['tracker_code']}")
-                print(f"   Tracking ID: {tracker['original_tracking_id']}")
-                print(f"   Calculated Stage: {stage}")
-                print(f"   Calculated Status: {current_status}")
-                print(f"   Status flags: Label={status.get('label', False)}, Packing={status.get('packing', False)}, Dispatch={status.get('dispatch', False)}, Pending={status.get('pending', False)}, Cancelled={status.get('cancelled', False)}")
-                
-                # Show all status fields
-                print(f"   All status fields: {status}")
+        # Read only the target trackers' documents
+        for tracker in get_frontend_trackers(target_trackers):
+            details = tracker['details']
+            status = tracker['status']
+            stage, current_status = STAGE_STATUS_TABLE[tracker['flag_key']]
+            
+            print(f"\n📊 Tracker: {tracker['tracker_code']}")
+            print(f"   Tracking ID: {tracker['original_tracking_id']}")
+            print(f"   Calculated Stage: {stage}")
+            print(f"   Calculated Status: {current_status}")
+            print(f"   Status flags: Label={status.get('label', False)}, Packing={status.get('packing', False)}, Dispatch={status.get('dispatch', False)}, Pending={status.get('pending', False)}, Cancelled={status.get('cancelled', False)}")
+            
+            # Show all status fields
+            print(f"   All status fields: {status}")
                 
     except Exception as e:
         print(f"❌ Debug error: {e}")
 
-if __name__ == "__main__":
-    print("Choose action:")
-    print("1. Preview frontend data")
-    print("2. Simple paste to Google Sheets (no modifications)")
-    print("3. Debug specific trackers")
-    
-    try:
-        choice = input("Enter choice (1, 2, or 3): ").strip()
+def run_paste(verify=False):
+    """Paste to Google Sheets and report the outcome"""
+    success = simple_paste_to_sheets(verify=verify)
+    if success:
+        print("\n🎉 Simple paste completed successfully!")
+    else:
+        print("\n❌ Simple paste failed!")
+    return success
+
+def interactive_menu(verify=False):
+    """Prompt for actions until the user quits; consecutive choices share the cached frontend data"""
+    configure_logging()
+    while True:
+        print("\nChoose action:")
+        print("1. Preview frontend data")
+        print("2. Simple paste to Google Sheets (no modifications)")
+        print("3. Debug specific trackers")
+        print("4. Refresh frontend data on next action")
+        print("q. Quit")
+        
+        choice = input("Enter choice (1, 2, 3, 4 or q): ").strip()
         
         if choice == "1":
             show_frontend_data_preview()
         elif choice == "2":
-            success = simple_paste_to_sheets()
-            if success:
-                print("\n🎉 Simple paste completed successfully!")
-            else:
-                print("\n❌ Simple paste failed!")
+            run_paste(verify)
         elif choice == "3":
             debug_specific_trackers()
+        elif choice == "4":
+            invalidate_frontend_cache()
+            print("🔄 Frontend data will be re-read from Firestore")
+        elif choice.lower() == "q":
+            break
         else:
             print("❌ Invalid choice!")
-            
+
+def main(argv=None):
+    """Run one action from the command line, or the interactive menu when none is given"""
+    parser = argparse.ArgumentParser(description="Paste the exact frontend tracker data to Google Sheets")
+    parser.add_argument('action', nargs='?', choices=['preview', 'paste', 'debug'],
+                        help="action to run (omit for the interactive menu)")
+    parser.add_argument('--verify', action='store_true',
+                        help="re-download the sheet after pasting to verify it")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="only log warnings and errors while fetching and pasting")
+    args = parser.parse_args(argv)
+    
+    configure_logging(logging.WARNING if args.quiet else logging.INFO)
+    
+    try:
+        if args.action == 'preview':
+            show_frontend_data_preview()
+        elif args.action == 'paste':
+            return 0 if run_paste(args.verify) else 1
+        elif args.action == 'debug':
+            debug_specific_trackers()
+        else:
+            interactive_menu(args.verify)
     except KeyboardInterrupt:
         print("\n⏹️ Operation interrupted by user")
+        return 130
     except Exception as e:
-        print(f"\n❌ Error: {e}") 
\ No newline at end of file
+        print(f"\n❌ Error: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,13 +5,31 @@ Test script for Google Sheets sync functionality with manual pasting verificatio
 
 import os
 import sys
+from collections import Counter
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Add the app directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.services.firestore_service import firestore_service
-from app.services.gsheets_service import gsheets_service
+from app.services.gsheets_service import TRACKER_SHEET_FIELDS, gsheets_service
+
+# Fields printed for the sample trackers
+SAMPLE_FIELDS = ['shipment_tracker', 'order_id', 'status', 'last_updated']
+
+def scan_tracker_samples(stop, sample_count=3):
+    """Stream the trackers page by page, returning the count and the first few samples"""
+    tracker_count = 0
+    samples = []
+    for tracker_code, tracker_data in firestore_service.iter_tracker_data(fields=SAMPLE_FIELDS):
+        if stop.is_set():
+            break
+        if len(samples) < sample_count:
+            samples.append((tracker_code, tracker_data))
+        tracker_count += 1
+    return tracker_count, samples
 
 def test_gsheets_sync():
     """Test the Google Sheets sync functionality with manual verification"""
@@ -29,27 +47,34 @@ def test_gsheets_sync():
     print(f"   Worksheet Name: {worksheet_name}")
     print()
     
-    # Test Google Sheets service initialization
-    print("🔧 Testing Google Sheets Service Initialization:")
-    try:
-        gsheets_initialized = gsheets_service.initialize()
-        if gsheets_initialized:
-            print("   ✅ Google Sheets service initialized successfully")
-            print(f"   📊 Using Spreadsheet: {gsheets_service.spreadsheet_id}")
-            print(f"   📋 Using Worksheet: {gsheets_service.worksheet_name}")
-        else:
-            print("   ❌ Google Sheets service initialization failed")
+    # Run the Firestore read alongside the Sheets handshake below; leaving the
+    # block joins it, and a failed handshake stops it at the next tracker
+    stop_fetch = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        firestore_fetch = executor.submit(scan_tracker_samples, stop_fetch)
+        
+        # Test Google Sheets service initialization
+        print("🔧 Testing Google Sheets Service Initialization:")
+        try:
+            gsheets_initialized = gsheets_service.initialize()
+            if gsheets_initialized:
+                print("   ✅ Google Sheets service initialized successfully")
+                print(f"   📊 Using Spreadsheet: {gsheets_service.spreadsheet_id}")
+                print(f"   📋 Using Worksheet: {gsheets_service.worksheet_name}")
+            else:
+                print("   ❌ Google Sheets service initialization failed")
+                stop_fetch.set()
+                return False
+        except Exception as e:
+            print(f"   ❌ Google Sheets service initialization error: {e}")
+            stop_fetch.set()
             return False
-    except Exception as e:
-        print(f"   ❌ Google Sheets service initialization error: {e}")
-        return False
-    print()
+        print()
     
     # Test Firestore data retrieval
     print("📊 Testing Firestore Data Retrieval:")
     try:
-        all_tracker_data = firestore_service.get_all_tracker_data()
-        tracker_count = len(all_tracker_data) if all_tracker_data else 0
+        tracker_count, samples = firestore_fetch.result()
         print(f"   ✅ Retrieved {tracker_count} trackers from Firestore")
         
         if tracker_count == 0:
@@ -59,14 +84,15 @@ def test_gsheets_sync():
         
         # Show sample data for verification
         print("   📋 Sample Tracker Data:")
-        sample_count = min(3, tracker_count)
-        for i, (tracker_code, tracker_data) in enumerate(list(all_tracker_data.items())[:sample_count]):
-            status = tracker_data.get('status', {})
-            print(f"      {i+1}. {tracker_code}")
-            print(f"         Tracking ID: {tracker_data.get('shipment_tracker', 'N/A')}")
-            print(f"         Order ID: {tracker_data.get('order_id', 'N/A')}")
-            print(f"         Status: Label={status.get('label', False)}, Packing={status.get('packing', False)}, Dispatch={status.get('dispatch', False)}")
-            print(f"         Last Updated: {tracker_data.get('last_updated', 'N/A')}")
+        for i, (tracker_code, tracker_data) in enumerate(samples, 1):
+            get = tracker_data.get
+            status = get('status') or {}
+            label, packing, dispatch = status.get('label', False), status.get('packing', False), status.get('dispatch', False)
+            print(f"      {i}. {tracker_code}")
+            print(f"         Tracking ID: {get('shipment_tracker', 'N/A')}")
+            print(f"         Order ID: {get('order_id', 'N/A')}")
+            print(f"         Status: Label={label}, Packing={packing}, Dispatch={dispatch}")
+            print(f"         Last Updated: {get('last_updated', 'N/A')}")
             print()
         
     except Exception as e:
@@ -77,9 +103,10 @@ def test_gsheets_sync():
     # Test Google Sheets sync
     print("🔄 Testing Google Sheets Sync:")
     try:
-        if all_tracker_data and tracker_count > 0:
+        if tracker_count > 0:
             print(f"   📝 Starting sync of {tracker_count} trackers...")
-            success = gsheets_service.sync_all_tracker_data(all_tracker_data)
+            # The sync reads the tracker data it pastes itself
+            success = gsheets_service.sync_all_tracker_data()
             if success:
                 print("   ✅ Google Sheets sync completed successfully")
                 print(f"   📊 Synced {tracker_count} trackers to Google Sheets")
@@ -88,28 +115,30 @@ def test_gsheets_sync():
                 # Verify the sync by reading back the data
                 print("\n🔍 Verifying Sync Results:")
                 try:
-                    worksheet = gsheets_service.worksheet
+                    spreadsheet = gsheets_service.sheets_service.open_by_key(gsheets_service.spreadsheet_id)
+                    worksheet = spreadsheet.worksheet(gsheets_service.worksheet_name)
                     if worksheet:
-                        # Get all values from the worksheet
-                        all_values = worksheet.get_all_values()
-                        header_count = len(all_values[0]) if all_values else 0
-                        data_count = len(all_values) - 1 if len(all_values) > 1 else 0
+                        # Read only what is inspected: the header plus 3 sample rows,
+                        # and column A (tracker codes) to count the data rows
+                        head = worksheet.get('A1:U4')
+                        header_count = len(head[0]) if head else 0
+                        data_count = max(len(worksheet.col_values(1)) - 1, 0)
                         
                         print(f"   📋 Headers found: {header_count} columns")
                         print(f"   📊 Data rows found: {data_count} rows")
                         
                         if data_count > 0:
                             print("   📋 Headers:")
-                            headers = all_values[0]
+                            headers = head[0]
                             for i, header in enumerate(headers, 1):
                                 print(f"      {i}. {header}")
                             
                             print("\n   📊 Sample Data (first 3 rows):")
-                            for i, row in enumerate(all_values[1:4], 1):
+                            for i, row in enumerate(head[1:4], 1):
                                 print(f"      Row {i}: {row[:5]}...")  # Show first 5 columns
                         
                         # Check if data starts from A2 as expected
-                        if len(all_values) > 1:
+                        if data_count > 0:
                             print(f"\n   ✅ Data starts from row 2 (A2) as expected")
                             print(f"   ✅ Headers preserved in row 1")
                         else:
@@ -178,9 +207,12 @@ def manual_sync_test():
     print("=" * 60)
     
     try:
-        # Initialize services
-        gsheets_service.initialize()
-        all_tracker_data = firestore_service.get_all_tracker_data()
+        # Initialize services while the trackers are fetched
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            gsheets_init = executor.submit(gsheets_service.initialize)
+            tracker_fetch = executor.submit(firestore_service.get_all_tracker_data, [*TRACKER_SHEET_FIELDS, 'status'])
+            gsheets_init.result()
+            all_tracker_data = tracker_fetch.result()
         
         if not all_tracker_data:
             print("❌ No tracker data found in Firestore")
@@ -198,13 +230,9 @@ def manual_sync_test():
             
             # Show sync summary
             print("\n📋 Sync Summary:")
-            stage_counts = {}
-            status_counts = {}
-            
-            for tracker_code, tracker_data in all_tracker_data.items():
-                stage, status = gsheets_service._get_latest_scan_info(tracker_data)
-                stage_counts[stage] = stage_counts.get(stage, 0) + 1
-                status_counts[status] = status_counts.get(status, 0) + 1
+            stages, statuses = zip(*map(gsheets_service._get_latest_scan_info, all_tracker_data.values()))
+            stage_counts = Counter(stages)
+            status_counts = Counter(statuses)
             
             print("   📊 Stage Distribution:")
             for stage, count in sorted(stage_counts.items()):
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for replaying the scan write-ahead log on startup
+"""
+import importlib
+import os
+import sys
+
+import orjson
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def scan_line(scan_id, tracker_code="A", scan_type="label"):
+    """A logged scan record as written by append_scan_log"""
+    return orjson.dumps({
+        "id": str(scan_id),
+        "tracker_code": tracker_code,
+        "tracking_id": tracker_code,
+        "scan_type": scan_type,
+        "timestamp": "2024-01-01T00:00:00",
+        "status": "completed"
+    }) + b"\n"
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    """A freshly imported backend whose data files live in tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    import simple_backend
+    return importlib.reload(simple_backend)
+
+def test_replay_truncates_partial_last_line(backend, tmp_path):
+    """A record torn by a crash mid-append is dropped and cut from the log"""
+    good = scan_line(1) + scan_line(2, "B")
+    log_file = tmp_path / backend.SCAN_LOG_FILE
+    log_file.write_bytes(good + scan_line(3, "C")[:20])
+
+    backend.load_data()
+
+    assert [scan.id for scan in backend.scans_db] == ["1", "2"]
+    assert backend.scan_seq == 2
+    assert backend.scan_log_pending == 2
+    assert log_file.read_bytes() == good
+
+def test_replay_terminates_unterminated_last_line(backend, tmp_path):
+    """A complete final record missing its newline is kept and terminated"""
+    log_file = tmp_path / backend.SCAN_LOG_FILE
+    log_file.write_bytes(scan_line(1) + scan_line(2, "B").rstrip(b"\n"))
+
+    backend.load_data()
+    backend.append_scan_log([{"id": "3", "tracker_code": "C", "tracking_id": "C", "scan_type": "label"}])
+
+    assert backend.scan_seq == 2
+    assert log_file.read_bytes().count(b"\n") == 3
+
+def test_replay_rejects_corruption_before_last_line(backend, tmp_path):
+    """Damage anywhere but the final record is not silently discarded"""
+    log_file = tmp_path / backend.SCAN_LOG_FILE
+    log_file.write_bytes(scan_line(1) + b"{not json\n" + scan_line(3, "C"))
+
+    with pytest.raises(orjson.JSONDecodeError):
+        backend.load_data()
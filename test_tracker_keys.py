@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for the unique tracker keys issued to detailed uploads
+"""
+import importlib
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A client for a freshly imported backend whose data files live in tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    import simple_backend
+    with TestClient(importlib.reload(simple_backend).app) as client:
+        yield client
+
+def upload(client, shipment_trackers):
+    """Upload one detailed tracker per shipment tracker"""
+    response = client.post(
+        "/api/v1/trackers/upload-detailed/",
+        json={"trackers": [{"shipment_tracker": code} for code in shipment_trackers]}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+def stored_shipments(client):
+    """Tracker key -> shipment tracker of every stored tracker"""
+    import simple_backend
+    return {code: data["shipment_tracker"] for code, data in simple_backend.tracker_data.items()}
+
+def test_batch_keys_do_not_overwrite_each_other(client):
+    """A literal X_1 in the batch is not reissued as the second X's key"""
+    result = upload(client, ["X_1", "X", "X"])
+
+    assert result["uploaded_count"] == 3
+    assert stored_shipments(client) == {"X_1": "X_1", "X": "X", "X_2": "X"}
+    assert result["total_trackers"] == 3
+
+def test_keys_skip_suffixes_already_stored(client):
+    """Suffixes taken by earlier uploads are skipped, however they were issued"""
+    upload(client, ["X", "X_2"])
+    upload(client, ["X", "X"])
+
+    assert stored_shipments(client) == {"X": "X", "X_2": "X_2", "X_1": "X", "X_3": "X"}